@@ -0,0 +1,290 @@
+# api/core/cache.py
+import asyncio
+import functools
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+import orjson
+
+
+class TTLCache:
+    """
+    Bounded in-process LRU cache whose entries expire after a time-to-live.
+
+    on_evict, if given, is called with the key and value of every entry the
+    cache drops by itself (least recently used or expired), under its lock.
+    """
+
+    def __init__(self, max_size: int, ttl: float, on_evict: Optional[Callable[[Hashable, Any], None]] = None):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.on_evict = on_evict
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                    if self.on_evict is not None:
+                        self.on_evict(key, entry[0])
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                evicted_key, (evicted, _) = self._entries.popitem(last=False)
+                self.evictions += 1
+                if self.on_evict is not None:
+                    self.on_evict(evicted_key, evicted)
+
+    def delete(self, key: Hashable):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._entries
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+class MemoryBackend:
+    """Result cache storage local to this process."""
+
+    def __init__(self, max_size: int, ttl: float):
+        # Entries are (user_id, value), so an evicted key can be dropped from its user's index
+        self._cache = TTLCache(max_size=max_size, ttl=ttl, on_evict=self._forget)
+        self._keys_by_user: Dict[str, set] = {}
+
+    def _forget(self, key: str, entry: tuple):
+        keys = self._keys_by_user.get(entry[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[entry[0]]
+
+    async def get(self, user_id: str, key: str) -> Any:
+        entry = self._cache.get(key)
+        return _MISSING if entry is None else entry[1]
+
+    async def set(self, user_id: str, key: str, value: Any):
+        # Indexed first: the set may evict this user's last other key and drop their index
+        self._keys_by_user.setdefault(user_id, set()).add(key)
+        self._cache.set(key, (user_id, value))
+
+    async def delete_user(self, user_id: str):
+        for key in self._keys_by_user.pop(user_id, ()):
+            self._cache.delete(key)
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self._cache.stats()
+        return {"backend": "memory", "size": stats["size"], "max_size": stats["max_size"], "evictions": stats["evictions"]}
+
+
+class RedisBackend:
+    """
+    Result cache storage shared by every worker through Redis (requires the redis package).
+
+    Results are stored as JSON, so cached methods must return JSON-serialisable
+    values; dates and datetimes come back as ISO strings, which the routes'
+    response models parse again.
+    """
+
+    def __init__(self, url: str, ttl: float):
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("RESULT_CACHE_BACKEND=redis requires the 'redis' package to be installed.") from e
+        self._redis = redis.from_url(url)
+        self.ttl = int(ttl)
+
+    @staticmethod
+    def _user_index(user_id: str) -> str:
+        return f"trak:result-keys:{user_id}"
+
+    async def get(self, user_id: str, key: str) -> Any:
+        raw = await self._redis.get(f"trak:result:{key}")
+        return _MISSING if raw is None else orjson.loads(raw)
+
+    async def set(self, user_id: str, key: str, value: Any):
+        index = self._user_index(user_id)
+        async with self._redis.pipeline(transaction=False) as pipe:
+            pipe.set(f"trak:result:{key}", orjson.dumps(value), ex=self.ttl)
+            pipe.sadd(index, key)
+            pipe.expire(index, self.ttl)
+            await pipe.execute()
+
+    async def delete_user(self, user_id: str):
+        index = self._user_index(user_id)
+        keys = await self._redis.smembers(index)
+        await self._redis.delete(index, *(f"trak:result:{key.decode()}" for key in keys))
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "redis"}
+
+
+_MISSING = object()
+
+
+def _key_part(value: Any) -> Any:
+    # Sets have no stable order, so key them by their sorted contents.
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted(value))
+    return value
+
+
+class ResultCache:
+    """
+    Per-user cache of service results with single-flight misses.
+
+    Entries are keyed by user, data version, method and arguments (see cached). A
+    write bumps the user's data version, so every worker stops using older entries
+    at once; invalidate_user, called when the write commits, only frees them early
+    in this process. Concurrent misses for the same key share one computation.
+    """
+
+    def __init__(self, backend=None):
+        self.backend = backend
+        # Computations in progress, by user and key
+        self._in_flight: Dict[str, Dict[str, asyncio.Future]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.invalidations = 0
+
+    @classmethod
+    def from_env(cls) -> "ResultCache":
+        backend_name = os.getenv("RESULT_CACHE_BACKEND", "memory").lower()
+        ttl = float(os.getenv("RESULT_CACHE_TTL_SECONDS", "60"))
+        if backend_name == "none":
+            return cls(None)
+        if backend_name == "redis":
+            return cls(RedisBackend(os.getenv("RESULT_CACHE_REDIS_URL", "redis://localhost:6379/0"), ttl))
+        return cls(MemoryBackend(int(os.getenv("RESULT_CACHE_MAX_SIZE", "10000")), ttl))
+
+    async def get_or_compute(self, user_id: str, key: str, compute: Callable[[], Awaitable[Any]]) -> Any:
+        if self.backend is None:
+            return await compute()
+
+        value = await self.backend.get(user_id, key)
+        if value is not _MISSING:
+            self.hits += 1
+            return value
+
+        flights = self._in_flight.get(user_id)
+        in_flight = flights.get(key) if flights else None
+        if in_flight is not None:
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(in_flight)
+            except asyncio.CancelledError:
+                if not in_flight.cancelled():
+                    raise
+            # The request computing the result went away, so compute it here
+            return await compute()
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight.setdefault(user_id, {})[key] = future
+        try:
+            value = await compute()
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved in case nobody else was waiting
+            future.exception()
+            raise
+        except BaseException:
+            future.cancel()
+            raise
+        else:
+            future.set_result(value)
+            # A write committed during the computation has dropped it and may have outdated the result
+            if self._is_in_flight(user_id, key, future):
+                await self.backend.set(user_id, key, value)
+            return value
+        finally:
+            if self._is_in_flight(user_id, key, future):
+                flights = self._in_flight[user_id]
+                del flights[key]
+                if not flights:
+                    del self._in_flight[user_id]
+
+    def _is_in_flight(self, user_id: str, key: str, future: asyncio.Future) -> bool:
+        flights = self._in_flight.get(user_id)
+        return flights is not None and flights.get(key) is future
+
+    async def invalidate_user(self, user_id: str):
+        """Drops every cached result of the user. Call it after their write commits."""
+        user_id = str(user_id)
+        if self.backend is None:
+            return
+        self.invalidations += 1
+        # Reads from now on compute afresh instead of joining a computation that predates the write
+        self._in_flight.pop(user_id, None)
+        await self.backend.delete_user(user_id)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses + self.coalesced
+        stats = {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "invalidations": self.invalidations,
+            "hit_ratio": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0,
+        }
+        if self.backend is not None:
+            stats.update(self.backend.stats())
+        return stats
+
+
+result_cache = ResultCache.from_env()
+
+
+def cached(method):
+    """
+    Caches an async service method's result per user in result_cache.
+
+    The decorated method must take the user id as its first argument. The service's
+    data_version (the user's users.data_version, read from the primary for the
+    request) is part of the key, so a result computed before one of the user's
+    writes is never served after it, whichever worker cached it. Methods whose
+    result depends on the current day take the user's local day as an argument, so
+    it is part of the key and entries roll over at the user's midnight.
+    """
+    @functools.wraps(method)
+    async def wrapper(self, user_id, *args, **kwargs):
+        key_args = tuple(_key_part(arg) for arg in args) + tuple(sorted((k, _key_part(v)) for k, v in kwargs.items()))
+        key = f"{user_id}:{self.data_version}:{method.__qualname__}:{key_args!r}"
+        return await result_cache.get_or_compute(str(user_id), key, lambda: method(self, user_id, *args, **kwargs))
+
+    return wrapper
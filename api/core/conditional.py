@@ -0,0 +1,68 @@
+# api/core/conditional.py
+import hashlib
+from fastapi import Depends, HTTPException, Request, Response, status
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.v1.models.user import User
+from .dates import local_today
+from .security import get_current_user
+from ..db.database import get_db
+
+# Clients may keep a copy but must revalidate it with If-None-Match before use.
+CACHE_CONTROL = "private, no-cache"
+
+
+def bump_data_version(*user_ids):
+    """UPDATE that marks the users' study data as changed. Run it in the writing transaction."""
+    # Leave updated_at alone: this is not a change to the user's profile.
+    return (
+        update(User)
+        .where(User.id.in_(user_ids))
+        .values(data_version=User.data_version + 1, updated_at=User.updated_at)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison, as RFC 9110 requires for If-None-Match."""
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+async def get_data_version(
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+) -> int:
+    """The user's data_version, read from the primary once per request."""
+    version = await db.scalar(select(User.data_version).where(User.id == current_user.id))
+    # End the transaction so the primary connection goes back to the pool while the
+    # endpoint reads, often from a replica
+    await db.commit()
+    return version
+
+
+async def conditional_get(
+    request: Request,
+    response: Response,
+    current_user: User = Depends(get_current_user),
+    version: int = Depends(get_data_version),
+):
+    """
+    Dependency for per-user read endpoints that answers unchanged re-fetches with 304.
+
+    The ETag combines the user's data version, the user's current local day (streaks
+    and date ranges move at their midnight) and the request URL, and is checked before the
+    endpoint runs any of its own queries.
+    """
+    fingerprint = f"{current_user.id}:{version}:{local_today(current_user.timezone)}:{request.url.path}?{request.url.query}"
+    etag = f'"{hashlib.sha256(fingerprint.encode()).hexdigest()[:32]}"'
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL, "Vary": "Authorization"}
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, etag):
+        raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    response.headers.update(headers)
@@ -0,0 +1,39 @@
+# api/core/dates.py
+from datetime import date, datetime, time
+from typing import Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+
+DEFAULT_TIMEZONE = "UTC"
+
+
+def is_valid_timezone(name: str) -> bool:
+    """True if name is an IANA timezone such as 'Europe/Berlin'."""
+    try:
+        ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        return False
+    return True
+
+
+def user_zone(name: Optional[str]) -> ZoneInfo:
+    """The user's timezone, falling back to UTC for missing or unknown names."""
+    try:
+        return ZoneInfo(name or DEFAULT_TIMEZONE)
+    except (ZoneInfoNotFoundError, ValueError):
+        return ZoneInfo(DEFAULT_TIMEZONE)
+
+
+def local_today(tz_name: Optional[str]) -> date:
+    """Returns the current calendar day in the user's timezone."""
+    return datetime.now(user_zone(tz_name)).date()
+
+
+def local_day(moment: datetime, tz_name: Optional[str]) -> date:
+    """Returns the calendar day an aware datetime falls on in the user's timezone."""
+    return moment.astimezone(user_zone(tz_name)).date()
+
+
+def local_day_start(day: date, tz_name: Optional[str]) -> datetime:
+    """Returns local midnight at the start of the given day in the user's timezone."""
+    return datetime.combine(day, time.min, tzinfo=user_zone(tz_name))
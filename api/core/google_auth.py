@@ -1,24 +1,194 @@
-from authlib.integrations.starlette_client import OAuth
+from authlib.integrations.starlette_client import OAuth, StarletteOAuth2App
+import asyncio
+import logging
 import os
+import time
+from typing import Optional
 from dotenv import load_dotenv
 
+from .http import OUTBOUND_TIMEOUTS, http_client, shared_transport
+from .metrics import Counter
+
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+GOOGLE_DISCOVERY_URL = os.getenv(
+    "GOOGLE_DISCOVERY_URL", "https://accounts.google.com/.well-known/openid-configuration"
+)
+# How long the discovery document and JWKS are used before the background task refetches them.
+OIDC_METADATA_TTL_SECONDS = float(os.getenv("OIDC_METADATA_TTL_SECONDS", "3600"))
+# How soon a failed background refresh is retried; the previous documents stay in use meanwhile.
+OIDC_METADATA_RETRY_SECONDS = float(os.getenv("OIDC_METADATA_RETRY_SECONDS", "30"))
+# Minimum time between JWKS refetches triggered by ID tokens signed with an unknown key,
+# so forged tokens cannot make every sign-in call the provider.
+OIDC_JWKS_MIN_REFRESH_SECONDS = float(os.getenv("OIDC_JWKS_MIN_REFRESH_SECONDS", "60"))
+
+oidc_fetches = Counter(
+    "oidc_metadata_fetches_total", "OpenID discovery and JWKS fetches by document and outcome.", ("document", "outcome")
+)
+
+
+class OpenIDMetadata:
+    """
+    An OpenID provider's discovery document and JWKS, fetched ahead of use.
+
+    start() loads both and keeps them fresh from a background task, so sign-ins
+    never wait on them. If a refresh fails the previous documents stay in use.
+    An ID token signed with a key that is not in the JWKS refetches it at once
+    (keys rotate), at most every OIDC_JWKS_MIN_REFRESH_SECONDS.
+    """
+
+    def __init__(self, discovery_url: str, ttl: float = OIDC_METADATA_TTL_SECONDS,
+                 retry_interval: float = OIDC_METADATA_RETRY_SECONDS,
+                 jwks_min_refresh_interval: float = OIDC_JWKS_MIN_REFRESH_SECONDS):
+        self.discovery_url = discovery_url
+        self.ttl = ttl
+        self.retry_interval = retry_interval
+        self.jwks_min_refresh_interval = jwks_min_refresh_interval
+        self._metadata: Optional[dict] = None
+        self._jwks: Optional[dict] = None
+        self._loaded_at = 0.0
+        self._jwks_loaded_at = 0.0
+        self._unknown_key_refetched_at = float("-inf")
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    async def _get_json(self, document: str, url: str) -> dict:
+        try:
+            response = await http_client.get(url)
+            response.raise_for_status()
+            body = response.json()
+        except Exception:
+            oidc_fetches.labels(document, "error").inc()
+            raise
+        oidc_fetches.labels(document, "ok").inc()
+        return body
+
+    async def refresh(self):
+        """Fetches the discovery document, then the JWKS it points to."""
+        async with self._lock:
+            metadata = await self._get_json("discovery", self.discovery_url)
+            jwks = await self._get_json("jwks", metadata["jwks_uri"])
+            self._metadata, self._jwks = metadata, jwks
+            self._loaded_at = self._jwks_loaded_at = time.monotonic()
+
+    async def _refetch_jwks_for_unknown_key(self, loaded_at: float):
+        async with self._lock:
+            # Another sign-in may have refetched it while this one waited for the lock
+            if self._jwks_loaded_at == loaded_at:
+                self._unknown_key_refetched_at = time.monotonic()
+                self._jwks = await self._get_json("jwks", self._metadata["jwks_uri"])
+                self._jwks_loaded_at = time.monotonic()
+
+    async def _ensure_loaded(self):
+        # Without the background task (not started, or it failed), refresh on use
+        stale = time.monotonic() - self._loaded_at >= self.ttl
+        if self._metadata is None:
+            await self.refresh()
+        elif stale and (self._task is None or self._task.done()):
+            try:
+                await self.refresh()
+            except Exception:
+                logger.warning("Could not refresh OpenID metadata from %s; using the previous copy", self.discovery_url)
+
+    async def get_metadata(self) -> dict:
+        await self._ensure_loaded()
+        return self._metadata
+
+    async def get_jwks(self, unknown_key: bool = False) -> dict:
+        """The provider's JWKS; with unknown_key, refetched first unless that was done very recently."""
+        await self._ensure_loaded()
+        if unknown_key and time.monotonic() - self._unknown_key_refetched_at >= self.jwks_min_refresh_interval:
+            await self._refetch_jwks_for_unknown_key(self._jwks_loaded_at)
+        return self._jwks
+
+    def start(self):
+        """Starts the background refresh task; it fetches the documents right away."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.warning("Could not fetch OpenID metadata from %s: %s", self.discovery_url, e)
+                await asyncio.sleep(self.retry_interval)
+            else:
+                await asyncio.sleep(self.ttl)
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        return {
+            "loaded": self._metadata is not None,
+            "age_seconds": round(now - self._loaded_at, 1) if self._metadata is not None else None,
+            "jwks_age_seconds": round(now - self._jwks_loaded_at, 1) if self._jwks is not None else None,
+        }
+
+
+class CachedMetadataOAuth2App(StarletteOAuth2App):
+    """Authlib client that reads the provider's metadata and JWKS from an OpenIDMetadata instead of fetching them."""
+
+    def __init__(self, *args, openid_metadata: OpenIDMetadata, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.openid_metadata = openid_metadata
+
+    async def load_server_metadata(self):
+        return await self.openid_metadata.get_metadata()
+
+    async def fetch_jwk_set(self, force=False):
+        # Authlib forces a refetch when the ID token's key is not in the set
+        return await self.openid_metadata.get_jwks(unknown_key=force)
+
+
 class GoogleAuth:
-    def __init__(self):
+    def __init__(self, client_id: Optional[str] = None, client_secret: Optional[str] = None,
+                 discovery_url: str = GOOGLE_DISCOVERY_URL):
+        self.client_id = client_id or os.getenv('GOOGLE_CLIENT_ID')
+        self.metadata = OpenIDMetadata(discovery_url)
         self.oauth = OAuth()
         self.oauth.register(
             name='google',
-            client_id=os.getenv('GOOGLE_CLIENT_ID'),
-            client_secret=os.getenv('GOOGLE_CLIENT_SECRET'),
-            server_metadata_url='https://accounts.google.com/.well-known/openid_configuration',
+            client_id=self.client_id,
+            client_secret=client_secret or os.getenv('GOOGLE_CLIENT_SECRET'),
+            client_cls=CachedMetadataOAuth2App,
+            openid_metadata=self.metadata,
             client_kwargs={
-                'scope': 'openid email profile'
+                'scope': 'openid email profile',
+                # Token exchanges reuse the shared keep-alive pool instead of a new connection each
+                'transport': shared_transport,
+                'timeout': OUTBOUND_TIMEOUTS,
             }
         )
-    
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.client_id)
+
+    def start(self):
+        """Prefetches the provider's metadata and JWKS and keeps them fresh, when Google sign-in is configured."""
+        if self.enabled:
+            self.metadata.start()
+
+    async def stop(self):
+        await self.metadata.stop()
+
     async def authorize_redirect(self, request, redirect_uri):
         return await self.oauth.google.authorize_redirect(request, redirect_uri)
-    
+
     async def authorize_access_token(self, request):
-        return await self.oauth.google.authorize_access_token(request)
\ No newline at end of file
+        return await self.oauth.google.authorize_access_token(request)
+
+
+google_auth = GoogleAuth()
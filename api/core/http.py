@@ -0,0 +1,58 @@
+# api/core/http.py
+import os
+from typing import Optional
+
+import httpx
+
+# Outbound calls (OAuth providers) happen while a user waits, so fail fast
+# rather than holding the request open on a slow upstream.
+OUTBOUND_CONNECT_TIMEOUT = float(os.getenv("OUTBOUND_CONNECT_TIMEOUT", "2"))
+OUTBOUND_TIMEOUT = float(os.getenv("OUTBOUND_TIMEOUT", "5"))
+OUTBOUND_MAX_CONNECTIONS = int(os.getenv("OUTBOUND_MAX_CONNECTIONS", "20"))
+OUTBOUND_KEEPALIVE_SECONDS = float(os.getenv("OUTBOUND_KEEPALIVE_SECONDS", "60"))
+
+OUTBOUND_TIMEOUTS = httpx.Timeout(OUTBOUND_TIMEOUT, connect=OUTBOUND_CONNECT_TIMEOUT)
+
+_pool: Optional[httpx.AsyncHTTPTransport] = None
+
+
+def _get_pool() -> httpx.AsyncHTTPTransport:
+    global _pool
+    if _pool is None:
+        _pool = httpx.AsyncHTTPTransport(
+            limits=httpx.Limits(
+                max_connections=OUTBOUND_MAX_CONNECTIONS,
+                max_keepalive_connections=OUTBOUND_MAX_CONNECTIONS,
+                keepalive_expiry=OUTBOUND_KEEPALIVE_SECONDS,
+            ),
+            retries=1,
+        )
+    return _pool
+
+
+class SharedTransport(httpx.AsyncBaseTransport):
+    """
+    Sends requests over the process-wide keep-alive connection pool.
+
+    Closing a client built on it leaves the pool open, so libraries that open
+    and close a client per call (Authlib does) still reuse warm connections.
+    The pool itself is closed by close_http_client() at shutdown.
+    """
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        return await _get_pool().handle_async_request(request)
+
+    async def aclose(self):
+        pass
+
+
+shared_transport = SharedTransport()
+http_client = httpx.AsyncClient(transport=shared_transport, timeout=OUTBOUND_TIMEOUTS)
+
+
+async def close_http_client():
+    """Closes the pooled connections. Call on shutdown; the pool reopens on next use."""
+    global _pool
+    if _pool is not None:
+        await _pool.aclose()
+        _pool = None
@@ -0,0 +1,211 @@
+# api/core/instrumentation.py
+import functools
+import inspect
+import logging
+import os
+import time
+from collections import Counter as StatementCounter
+from contextvars import ContextVar
+from typing import Dict, Optional, Set, Tuple
+
+from sqlalchemy import event
+
+from .metrics import Counter, Gauge, Histogram
+
+logger = logging.getLogger(__name__)
+
+# Per-request budgets; a request over either one is logged as a warning. 0 disables a budget.
+REQUEST_QUERY_BUDGET = int(os.getenv("REQUEST_QUERY_BUDGET", "20"))
+REQUEST_DURATION_BUDGET_MS = float(os.getenv("REQUEST_DURATION_BUDGET_MS", "500"))
+
+NO_ROUTE = "unmatched"  # Requests that matched no route, e.g. 404s
+NO_REQUEST = "-"  # Statements run outside any HTTP request
+NO_METHOD = "-"  # Statements run outside any service method
+STATEMENT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100, 250)
+
+http_requests = Counter("http_requests_total", "HTTP requests handled.", ("method", "route", "status"))
+http_latency = Histogram("http_request_duration_seconds", "HTTP request latency.", labelnames=("method", "route"))
+http_in_flight = Gauge(
+    "http_requests_in_flight", "HTTP requests currently being handled.", ("route",),
+    function=lambda: _in_flight_by_route(),
+)
+request_statements = Histogram(
+    "http_request_db_statements", "SQL statements executed per HTTP request.", STATEMENT_BUCKETS, ("route",)
+)
+request_db_time = Histogram("http_request_db_seconds", "Time spent in SQL per HTTP request.", labelnames=("route",))
+db_statements = Counter("db_statements_total", "SQL statements executed.", ("route", "method"))
+db_time = Counter("db_statement_seconds_total", "Time spent executing SQL statements.", ("route", "method"))
+
+
+class RequestStats:
+    """SQL counters of the request being handled, shared with the cursor hooks through a contextvar."""
+
+    def __init__(self, scope):
+        self.scope = scope
+        self.statements = 0
+        self.db_seconds = 0.0
+        self.by_method = StatementCounter()
+
+    @property
+    def route(self) -> str:
+        route = self.scope.get("route")
+        return getattr(route, "path", NO_ROUTE)
+
+
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+_service_method: ContextVar[str] = ContextVar("service_method", default=NO_METHOD)
+
+# Requests being handled. They are counted by route at scrape time, since a
+# request's route is only known once the router has matched it.
+_in_flight: Set[RequestStats] = set()
+_in_flight_routes: Set[Tuple[str]] = set()
+
+
+def _in_flight_by_route() -> Dict[Tuple[str], int]:
+    # Routes that were busy before are reported as 0 rather than dropped
+    counts = dict.fromkeys(_in_flight_routes, 0)
+    for stats in list(_in_flight):
+        counts[(stats.route,)] = counts.get((stats.route,), 0) + 1
+    _in_flight_routes.update(counts)
+    return counts
+
+
+def instrument_service(cls):
+    """
+    Class decorator that tags SQL issued by each public async method with its name.
+
+    Statements run while e.g. LogService.log_study_sessions is executing are counted
+    under method="LogService.log_study_sessions" in db_statements_total, including
+    those of the tagged methods it calls. Async generator methods are tagged while
+    they produce each item.
+    """
+    for name, method in list(vars(cls).items()):
+        if name.startswith("_"):
+            continue
+        label = f"{cls.__name__}.{name}"
+        if inspect.iscoroutinefunction(method):
+            setattr(cls, name, _tagged(method, label))
+        elif inspect.isasyncgenfunction(method):
+            setattr(cls, name, _tagged_generator(method, label))
+    return cls
+
+
+def _tagged(method, label):
+    @functools.wraps(method)
+    async def wrapper(*args, **kwargs):
+        # Called from another tagged method: its statements count towards the caller
+        if _service_method.get() != NO_METHOD:
+            return await method(*args, **kwargs)
+        token = _service_method.set(label)
+        try:
+            return await method(*args, **kwargs)
+        finally:
+            _service_method.reset(token)
+
+    return wrapper
+
+
+def _tagged_generator(method, label):
+    # Tag only while the generator runs, not while its consumer handles an item
+    @functools.wraps(method)
+    async def wrapper(*args, **kwargs):
+        generator = method(*args, **kwargs)
+        outer = _service_method.get()
+        tag = label if outer == NO_METHOD else outer
+        try:
+            while True:
+                token = _service_method.set(tag)
+                try:
+                    item = await generator.__anext__()
+                except StopAsyncIteration:
+                    return
+                finally:
+                    _service_method.reset(token)
+                yield item
+        finally:
+            token = _service_method.set(tag)
+            try:
+                await generator.aclose()
+            finally:
+                _service_method.reset(token)
+
+    return wrapper
+
+
+def instrument_sql(engine):
+    """Times every statement the given (sync) engine executes and attributes it to the current request."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _start_timer(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        stats = _request_stats.get()
+        route = stats.route if stats else NO_REQUEST
+        method = _service_method.get()
+        db_statements.labels(route, method).inc()
+        db_time.labels(route, method).inc(elapsed)
+        if stats is not None:
+            stats.statements += 1
+            stats.db_seconds += elapsed
+            stats.by_method[method] += 1
+
+    @event.listens_for(engine, "handle_error")
+    def _discard_timer(context):
+        # A failed statement never reaches after_cursor_execute; drop its start time
+        # so it does not stay on the pooled connection.
+        conn = context.connection
+        if conn is not None and context.execution_context is not None:
+            starts = conn.info.get("query_start")
+            if starts:
+                starts.pop()
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, status and SQL usage of every HTTP request."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = RequestStats(scope)
+        token = _request_stats.set(stats)
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        _in_flight.add(stats)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            _in_flight.discard(stats)
+            _request_stats.reset(token)
+            self._record(scope["method"], stats, status_code, elapsed)
+
+    @staticmethod
+    def _record(method: str, stats: RequestStats, status_code: int, elapsed: float):
+        route = stats.route
+        http_requests.labels(method, route, status_code).inc()
+        http_latency.labels(method, route).observe(elapsed)
+        request_statements.labels(route).observe(stats.statements)
+        request_db_time.labels(route).observe(stats.db_seconds)
+
+        over_queries = REQUEST_QUERY_BUDGET and stats.statements > REQUEST_QUERY_BUDGET
+        over_time = REQUEST_DURATION_BUDGET_MS and elapsed * 1000 > REQUEST_DURATION_BUDGET_MS
+        if over_queries or over_time:
+            logger.warning(
+                "%s %s over budget: %d statements (budget %d), %.1f ms (budget %.0f ms), %.1f ms in SQL; by method: %s",
+                method, route, stats.statements, REQUEST_QUERY_BUDGET, elapsed * 1000,
+                REQUEST_DURATION_BUDGET_MS, stats.db_seconds * 1000, dict(stats.by_method.most_common()),
+            )
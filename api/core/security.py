@@ -1,21 +1,59 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import delete, exists, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from passlib.context import CryptContext
 from jose import JWTError, jwt
-from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
 from typing import Optional
+import asyncio
+import hashlib
 import os
+import time
+import uuid
 
 from api.v1.models.user import User
+from api.v1.models.revoked_token import RevokedToken
+from .cache import TTLCache
+from .metrics import Histogram
 from ..db.database import get_db
 
 security = HTTPBearer()
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+# bcrypt releases the GIL, so a small thread pool hashes in parallel without
+# blocking the event loop. Callers beyond the worker count wait on the loop,
+# and are turned away once too many are already waiting.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_HASH_MAX_WAITING = int(os.getenv("PASSWORD_HASH_MAX_WAITING", "64"))
+_password_hash_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+_password_hash_slots = asyncio.Semaphore(PASSWORD_HASH_WORKERS)
+_password_hash_waiting = 0
+password_hash_queue_time = Histogram("password_hash_queue_seconds", "Time password hashing calls wait for a worker.")
 
 SECRET_KEY = os.getenv("SECRET_KEY")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "30"))
+# Lifetime of the single-use code a Google sign-in redirects the browser to the frontend with.
+SIGN_IN_CODE_EXPIRE_SECONDS = int(os.getenv("SIGN_IN_CODE_EXPIRE_SECONDS", "60"))
+
+# Authenticated users resolved from tokens, keyed by token subject (email).
+user_cache = TTLCache(
+    max_size=int(os.getenv("USER_CACHE_MAX_SIZE", "10000")),
+    ttl=float(os.getenv("USER_CACHE_TTL_SECONDS", "60")),
+)
+
+# Verified access-token claims, keyed by token digest, so hot tokens skip jwt.decode
+# and the revocation lookup. An entry lives until the token expires, but at most
+# TOKEN_CACHE_TTL_SECONDS: that bounds how long a logout in another worker goes unseen.
+verified_tokens = TTLCache(
+    max_size=int(os.getenv("TOKEN_CACHE_MAX_SIZE", "10000")),
+    ttl=float(os.getenv("TOKEN_CACHE_TTL_SECONDS", "60")),
+)
 
 
 def verify_password(plain_password, hashed_password):
@@ -24,31 +62,133 @@ def verify_password(plain_password, hashed_password):
 def get_password_hash(password):
     return pwd_context.hash(password)
 
+async def _run_password_hasher(fn, *args):
+    """Runs a bcrypt call on the password hashing pool, applying the concurrency limit."""
+    global _password_hash_waiting
+    if _password_hash_waiting >= PASSWORD_HASH_MAX_WAITING:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many authentication requests, please retry shortly.",
+            headers={"Retry-After": "1"},
+        )
+
+    queued_at = time.perf_counter()
+    _password_hash_waiting += 1
+    try:
+        await _password_hash_slots.acquire()
+    finally:
+        _password_hash_waiting -= 1
+    try:
+        password_hash_queue_time.observe(time.perf_counter() - queued_at)
+        return await asyncio.get_running_loop().run_in_executor(_password_hash_executor, fn, *args)
+    finally:
+        _password_hash_slots.release()
+
+async def verify_password_async(plain_password, hashed_password):
+    return await _run_password_hasher(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password):
+    return await _run_password_hasher(get_password_hash, password)
+
+def password_hashing_stats() -> dict:
+    return {
+        "workers": PASSWORD_HASH_WORKERS,
+        "waiting": _password_hash_waiting,
+        "queue_seconds": password_hash_queue_time.snapshot(),
+    }
+
+def token_claims(user: User) -> dict:
+    """Claims identifying a user: the email as subject, plus the id for primary-key lookups."""
+    return {"sub": user.email, "uid": str(user.id)}
+
+def invalidate_cached_user(email: str):
+    """Drops a user from the authentication cache after their account changes."""
+    user_cache.delete(email)
+
+def hash_token(token: str) -> str:
+    """SHA-256 digest of a token, for storing and looking up tokens without keeping them."""
+    return hashlib.sha256(token.encode()).hexdigest()
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
     else:
         expire = datetime.utcnow() + timedelta(minutes=15)
-    to_encode.update({"exp": expire})
+    # The jti lets a single token be revoked on logout
+    to_encode.update({"exp": expire, "jti": str(uuid.uuid4())})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
+async def get_token_payload(credentials: HTTPAuthorizationCredentials = Depends(security), db: AsyncSession = Depends(get_db)) -> dict:
+    """The verified claims of the bearer token, from verified_tokens when it was seen recently."""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+    digest = hash_token(credentials.credentials)
+    payload = verified_tokens.get(digest)
+    if payload is not None:
+        return payload
+
     try:
         payload = jwt.decode(credentials.credentials, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
+        if payload.get("sub") is None:
             raise credentials_exception
-    except JWTError:
+        jti = uuid.UUID(payload["jti"]) if "jti" in payload else None
+    except (JWTError, ValueError):
         raise credentials_exception
-    
-    user = db.query(User).filter(User.email == email).first()
-    if user is None:
+
+    # Tokens issued before the jti claim existed cannot be revoked
+    if jti is not None and await db.scalar(select(exists().where(RevokedToken.jti == jti))):
         raise credentials_exception
+
+    ttl = min(payload["exp"] - time.time(), verified_tokens.ttl)
+    if ttl > 0:
+        verified_tokens.set(digest, payload, ttl)
+    return payload
+
+async def revoke_access_token(db: AsyncSession, token: str, payload: dict):
+    """Denylists an access token until it expires; other workers stop accepting it within TOKEN_CACHE_TTL_SECONDS."""
+    verified_tokens.delete(hash_token(token))
+    if "jti" not in payload:
+        return
+    now = datetime.now(timezone.utc)
+    await db.execute(delete(RevokedToken).where(RevokedToken.expires_at < now))
+    await db.execute(
+        insert(RevokedToken)
+        .values(jti=uuid.UUID(payload["jti"]), expires_at=datetime.fromtimestamp(payload["exp"], timezone.utc))
+        .on_conflict_do_nothing()
+    )
+    await db.commit()
+
+async def get_current_user(payload: dict = Depends(get_token_payload), db: AsyncSession = Depends(get_db)):
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+    email: str = payload["sub"]
+
+    user = user_cache.get(email)
+    if user is not None:
+        return user
+
+    user_id = payload.get("uid")
+    if user_id is not None:
+        try:
+            user = await db.get(User, uuid.UUID(user_id))
+        except ValueError:
+            raise credentials_exception
+    else:
+        # Tokens issued before the uid claim existed only carry the email
+        user = await db.scalar(select(User).where(User.email == email))
+
+    if user is None or user.email != email or user.is_active is False:
+        raise credentials_exception
+
+    # Detach the user so the cached instance outlives this request's session
+    db.expunge(user)
+    user_cache.set(email, user)
     return user
\ No newline at end of file
@@ -1,20 +1,140 @@
-from sqlalchemy import create_engine
+from contextlib import asynccontextmanager
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import DBAPIError, TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
 from dotenv import load_dotenv
 
+from api.core.instrumentation import instrument_sql
+from .pool import InstrumentedAsyncQueuePool, instrument_engine
+from .replicas import DATABASE_REPLICA_URLS, REPLICA_CONNECT_TIMEOUT, REPLICA_POOL_TIMEOUT, read_routes, replica_router
+
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Connection pool settings, shared by the sync and async engines.
+POOL_OPTIONS = {
+    "pool_size": int(os.getenv("DB_POOL_SIZE", "5")),
+    "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", "10")),
+    "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+    "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "1800")),
+    "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "false").lower() in ("1", "true", "yes"),
+}
+
+
+def _async_url(url: str) -> str:
+    """Returns the asyncpg flavour of a postgres URL."""
+    return make_url(url).set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or (DATABASE_URL and _async_url(DATABASE_URL))
+
+# Engines are created on first use rather than at import, so importing the app
+# (for tooling, migrations or tests) never opens a database connection.
+engine = None
+async_engine = None
+
+# Sync sessions, kept for scripts and one-off maintenance tasks.
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
+
+# Async sessions used by the API.
+AsyncSessionLocal = async_sessionmaker(autoflush=False, expire_on_commit=False)
+
+
+def init_engines():
+    """Creates the sync and async engines once and binds the session factories to them."""
+    global engine, async_engine
+    if async_engine is None:
+        engine = create_engine(DATABASE_URL, **POOL_OPTIONS)
+        async_engine = create_async_engine(ASYNC_DATABASE_URL, poolclass=InstrumentedAsyncQueuePool, **POOL_OPTIONS)
+        instrument_engine(async_engine.sync_engine)
+        instrument_sql(async_engine.sync_engine)
+        SessionLocal.configure(bind=engine)
+        AsyncSessionLocal.configure(bind=async_engine)
+        replica_router.configure([_replica_engine(url) for url in DATABASE_REPLICA_URLS])
+    return async_engine
+
+
+def _replica_engine(url: str):
+    replica = create_async_engine(
+        _async_url(url), poolclass=InstrumentedAsyncQueuePool,
+        connect_args={"timeout": REPLICA_CONNECT_TIMEOUT}, **{**POOL_OPTIONS, "pool_timeout": REPLICA_POOL_TIMEOUT},
+    )
+    instrument_sql(replica.sync_engine)
+    return replica
+
+
+def get_async_engine():
+    """Returns the async engine, creating it if needed."""
+    return init_engines()
+
+
+async def dispose_engines():
+    """Closes every pooled connection; the engines are recreated on the next init."""
+    global engine, async_engine
+    if async_engine is not None:
+        await async_engine.dispose()
+        engine.dispose()
+        engine = async_engine = None
+        for replica in replica_router.replicas:
+            await replica.engine.dispose()
+        replica_router.configure([])
+
 Base = declarative_base()
 
-def get_db():
+async def get_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+@asynccontextmanager
+async def read_session(user_id=None, data_version=None):
+    """
+    Session for read-only work, on a read replica when one is configured.
+
+    `data_version` is the user's users.data_version as read from the primary;
+    when the replica has not replayed that write yet the read uses the primary,
+    so a response is never older than the ETag it is sent with. Reads while
+    every replica is down or its pool is exhausted also use the primary. The
+    connection is taken up front so that such a replica is noticed here.
+    """
+    replica = replica_router.route()
+    if replica is not None:
+        db = AsyncSession(bind=replica.engine, autoflush=False, expire_on_commit=False)
+        try:
+            replica_version = None
+            if data_version is not None:
+                replica_version = await db.scalar(
+                    text("SELECT data_version FROM users WHERE id = :user_id"), {"user_id": user_id}
+                )
+            else:
+                await db.connection()
+        except PoolTimeoutError:
+            # Busy, not broken: keep it in rotation
+            await db.close()
+            read_routes.labels("primary_replica_busy").inc()
+        except (OSError, DBAPIError) as e:
+            await db.close()
+            replica_router.mark_down(replica, e)
+            read_routes.labels("primary_fallback").inc()
+        else:
+            if data_version is None or (replica_version is not None and replica_version >= data_version):
+                read_routes.labels("replica").inc()
+                async with db:
+                    yield db
+                return
+            await db.close()
+            read_routes.labels("primary_replica_behind").inc()
+
+    async with AsyncSessionLocal() as db:
+        yield db
+
+def get_sync_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
@@ -0,0 +1,71 @@
+# api/db/pool.py
+import time
+from typing import Dict
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from api.core.metrics import Counter, Gauge, Histogram
+
+
+class PoolStats:
+    """Connection pool counters and timings collected from pool events."""
+
+    def __init__(self):
+        self.pool = None  # The async engine's pool, set by instrument_engine
+        self.checkout_wait = Histogram("db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection.")
+        self.connect_latency = Histogram("db_pool_connect_seconds", "Time spent opening a new database connection.")
+        self.checkout_timeouts = Counter("db_pool_checkout_timeouts_total", "Checkouts that gave up waiting for a connection.")
+        self.connect_errors = Counter("db_pool_connect_errors_total", "Failed attempts to open a database connection.")
+        Gauge("db_pool_checked_out", "Connections currently checked out of the pool.",
+              function=lambda: self.pool.checkedout() if self.pool else 0)
+        Gauge("db_pool_checked_in", "Idle connections in the pool.",
+              function=lambda: self.pool.checkedin() if self.pool else 0)
+        Gauge("db_pool_overflow", "Connections open beyond the pool size.",
+              function=lambda: max(self.pool.overflow(), 0) if self.pool else 0)
+
+    def snapshot(self, pool) -> Dict:
+        return {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "checkout_timeouts": int(self.checkout_timeouts.value),
+            "connect_errors": int(self.connect_errors.value),
+            "checkout_wait_seconds": self.checkout_wait.snapshot(),
+            "connect_seconds": self.connect_latency.snapshot(),
+        }
+
+
+pool_stats = PoolStats()
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool that records how long each checkout waited."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            pool_stats.checkout_timeouts.inc()
+            raise
+        finally:
+            pool_stats.checkout_wait.observe(time.perf_counter() - start)
+
+
+def instrument_engine(engine):
+    """Times every new DBAPI connection opened by the given (sync) engine."""
+    pool_stats.pool = engine.pool
+
+    @event.listens_for(engine, "do_connect")
+    def _timed_connect(dialect, conn_rec, cargs, cparams):
+        start = time.perf_counter()
+        try:
+            return dialect.connect(*cargs, **cparams)
+        except Exception:
+            pool_stats.connect_errors.inc()
+            raise
+        finally:
+            pool_stats.connect_latency.observe(time.perf_counter() - start)
@@ -0,0 +1,91 @@
+# api/db/replicas.py
+import itertools
+import logging
+import os
+import time
+from typing import Dict, List, Optional
+
+from sqlalchemy.engine import make_url
+
+from api.core.metrics import Counter
+
+logger = logging.getLogger(__name__)
+
+# Comma-separated URLs of read replicas of DATABASE_URL; empty sends every read to the primary.
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+# How long a replica that failed to connect is left out before it is tried again.
+REPLICA_RETRY_SECONDS = float(os.getenv("REPLICA_RETRY_SECONDS", "30"))
+REPLICA_CONNECT_TIMEOUT = float(os.getenv("REPLICA_CONNECT_TIMEOUT", "2"))
+# How long a read waits for a free replica connection before using the primary instead.
+REPLICA_POOL_TIMEOUT = float(os.getenv("REPLICA_POOL_TIMEOUT", "1"))
+
+read_routes = Counter("db_read_routes_total", "Read sessions by where they were sent and why.", ("target",))
+replica_failures = Counter("db_replica_failures_total", "Replica connection failures that fell back to the primary.")
+
+
+class Replica:
+    def __init__(self, engine):
+        self.engine = engine
+        self.down_until = 0.0
+
+    @property
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.down_until
+
+    def stats(self) -> Dict:
+        pool = self.engine.pool
+        return {
+            "host": make_url(str(self.engine.url)).render_as_string(hide_password=True),
+            "healthy": self.healthy,
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+        }
+
+
+class ReplicaRouter:
+    """
+    Picks the engine for a read-only session: a healthy replica in round-robin
+    order, or the primary (None) when there is none or all are down.
+
+    Health is checked on use: a replica that cannot be connected to is marked
+    down for REPLICA_RETRY_SECONDS, then tried again by the next read. Whether
+    the replica has caught up with the user's writes is checked by read_session
+    against the user's data_version, which every worker sees alike.
+    """
+
+    def __init__(self, retry_seconds: float = REPLICA_RETRY_SECONDS):
+        self.retry_seconds = retry_seconds
+        self.replicas: List[Replica] = []
+        self._next = itertools.count()
+
+    def configure(self, engines):
+        self.replicas = [Replica(engine) for engine in engines]
+
+    def route(self) -> Optional[Replica]:
+        """
+        Returns the replica to read from, or None for the primary.
+
+        Reads sent to a replica are counted by read_session, which may still fall
+        back to the primary.
+        """
+        if not self.replicas:
+            read_routes.labels("primary").inc()
+            return None
+        for _ in range(len(self.replicas)):
+            replica = self.replicas[next(self._next) % len(self.replicas)]
+            if replica.healthy:
+                return replica
+        read_routes.labels("primary_replicas_down").inc()
+        return None
+
+    def mark_down(self, replica: Replica, error: Exception):
+        replica_failures.inc()
+        replica.down_until = time.monotonic() + self.retry_seconds
+        logger.warning("Read replica %s is unavailable, using the primary for %.0f s: %s",
+                       replica.stats()["host"], self.retry_seconds, error)
+
+    def stats(self) -> List[Dict]:
+        return [replica.stats() for replica in self.replicas]
+
+
+replica_router = ReplicaRouter()
@@ -2,4 +2,8 @@
 from .user import User
 from .course import Course
 from .user_course import UserCourse
-from .study_session import StudySession
\ No newline at end of file
+from .study_session import StudySession
+from .study_day import StudyDay
+from .user_streak import UserStreak
+from .refresh_token import RefreshToken
+from .revoked_token import RevokedToken
\ No newline at end of file
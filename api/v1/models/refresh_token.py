@@ -0,0 +1,22 @@
+# api/v1/models/refresh_token.py
+import uuid
+from sqlalchemy import Column, ForeignKey, String, DateTime, Index
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+from api.db.database import Base
+
+class RefreshToken(Base):
+    __tablename__ = "refresh_tokens"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    family_id = Column(UUID(as_uuid=True), nullable=False, index=True)  # Shared by every rotation of one sign-in
+    token_hash = Column(String(64), nullable=False, unique=True)  # SHA-256 of the token; the token itself is never stored
+    device = Column(String(200), nullable=True)  # User-Agent of the sign-in
+    expires_at = Column(DateTime(timezone=True), nullable=False)
+    revoked_at = Column(DateTime(timezone=True), nullable=True)  # Set when rotated, logged out or reused
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_refresh_tokens_user_device", "user_id", "device"),
+    )
@@ -0,0 +1,11 @@
+# api/v1/models/revoked_token.py
+from sqlalchemy import Column, DateTime
+from sqlalchemy.dialects.postgresql import UUID
+from api.db.database import Base
+
+# Access tokens revoked before they expire, by jti; rows can be dropped once expired.
+class RevokedToken(Base):
+    __tablename__ = "revoked_tokens"
+
+    jti = Column(UUID(as_uuid=True), primary_key=True)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
@@ -0,0 +1,17 @@
+# api/v1/models/study_day.py
+from sqlalchemy import Column, ForeignKey, Date, Index
+from sqlalchemy.dialects.postgresql import UUID
+from api.db.database import Base
+
+# Daily rollup of study_sessions: one row per (user, course, day) studied.
+# Written by LogService in the same transaction as the session itself.
+class StudyDay(Base):
+    __tablename__ = "study_days"
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    course_id = Column(UUID(as_uuid=True), ForeignKey("courses.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+
+    __table_args__ = (
+        Index("ix_study_days_user_day", "user_id", "day"),
+    )
@@ -1,6 +1,6 @@
 # api/v1/models/study_session.py
 import uuid
-from sqlalchemy import Column, ForeignKey, DateTime
+from sqlalchemy import Column, ForeignKey, Date, DateTime, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
@@ -14,6 +14,17 @@ class StudySession(Base):
     course_id = Column(UUID(as_uuid=True), ForeignKey("courses.id", ondelete="CASCADE"), nullable=False)
     
     date = Column(DateTime(timezone=True), server_default=func.now())
+    # Calendar day of `date` in the user's timezone, fixed when the session is written.
+    study_day = Column(Date, nullable=False)
     
     user = relationship("User", back_populates="study_sessions")
-    course = relationship("Course", back_populates="study_sessions")
\ No newline at end of file
+    course = relationship("Course", back_populates="study_sessions")
+
+    __table_args__ = (
+        # (date, id) is the keyset of the history pages, so each page is one index range scan.
+        Index("ix_study_sessions_user_date_id", "user_id", "date", "id"),
+        Index("ix_study_sessions_user_course_date_id", "user_id", "course_id", "date", "id"),
+        Index("ix_study_sessions_user_study_day", "user_id", "study_day"),
+        # At most one session per course per (local) day.
+        Index("uq_study_sessions_user_course_study_day", "user_id", "course_id", "study_day", unique=True),
+    )
\ No newline at end of file
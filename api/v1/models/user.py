@@ -1,6 +1,6 @@
 # api/v1/models/user.py
 import uuid
-from sqlalchemy import Column, String, Boolean, DateTime
+from sqlalchemy import Column, String, Boolean, DateTime, Integer
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
@@ -17,6 +17,8 @@ class User(Base):
     auth_provider = Column(String, default="email")  # "email" or "google"
     is_active = Column(Boolean, default=True)
     is_verified = Column(Boolean, default=False)
+    timezone = Column(String, nullable=False, default="UTC", server_default="UTC")  # IANA name; study days are counted in it
+    data_version = Column(Integer, nullable=False, default=0, server_default="0")  # Bumped on every study data write
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
@@ -1,6 +1,6 @@
 # api/v1/models/user_course.py
 import uuid
-from sqlalchemy import Column, ForeignKey, DateTime, Integer
+from sqlalchemy import Column, ForeignKey, DateTime, Integer, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from api.db.database import Base
@@ -16,4 +16,8 @@ class UserCourse(Base):
     total_study_days = Column(Integer, default=0)
     
     user = relationship("User", back_populates="user_courses")
-    course = relationship("Course", back_populates="user_courses")
\ No newline at end of file
+    course = relationship("Course", back_populates="user_courses")
+
+    __table_args__ = (
+        UniqueConstraint("user_id", "course_id", name="uq_user_courses_user_course"),
+    )
\ No newline at end of file
@@ -0,0 +1,14 @@
+# api/v1/models/user_streak.py
+from sqlalchemy import Column, ForeignKey, Date, DateTime, Integer
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+from api.db.database import Base
+
+class UserStreak(Base):
+    __tablename__ = "user_streaks"
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    current_streak = Column(Integer, nullable=False, default=0)
+    longest_streak = Column(Integer, nullable=False, default=0)
+    last_study_day = Column(Date)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -1,29 +1,29 @@
 # api/v1/routes/analytics.py
 from fastapi import APIRouter, Depends, Query, status, HTTPException
-from sqlalchemy.orm import Session
 
-from api.db.database import get_db
-from ..services.analytics import AnalyticsService
+from api.db.database import read_session
+from ..services.analytics import AnalyticsService, MAX_RANGE_DAYS, MAX_WINDOWS
 from api.core.security import get_current_user
-from ..schemas.analytics import AnalyticsResponse
+from api.core.conditional import conditional_get, get_data_version
+from api.core.dates import local_today
+from ..schemas.analytics import AnalyticsResponse, AnalyticsOverview
 from ..models.user import User
 
-router = APIRouter()
+router = APIRouter(dependencies=[Depends(conditional_get)])
 
-def get_analytics_service(db: Session = Depends(get_db)):
-    """Dependency that provides an AnalyticsService instance."""
-    return AnalyticsService(db)
-
-@router.get("", response_model=AnalyticsResponse, status_code=status.HTTP_200_OK)
-def get_analytics_data(
-    range: str = Query("30d", description="Date range for analytics (e.g., '7d', '30d', '90d')."),
-    analytics_service: AnalyticsService = Depends(get_analytics_service),
-    current_user: User = Depends(get_current_user)
+async def get_analytics_service(
+    current_user: User = Depends(get_current_user),
+    data_version: int = Depends(get_data_version)
 ):
-    # Parse the 'range' query parameter
+    """Dependency that provides an AnalyticsService reading from a replica when one has caught up with the user's writes."""
+    async with read_session(current_user.id, data_version) as db:
+        yield AnalyticsService(db, data_version)
+
+def parse_range(value: str) -> int:
+    """Parses an 'Xd' range into a number of days, within 1..MAX_RANGE_DAYS."""
     try:
-        if range.endswith("d"):
-            range_in_days = int(range[:-1])
+        if value.endswith("d"):
+            range_in_days = int(value[:-1])
         else:
             raise ValueError
     except ValueError:
@@ -31,5 +31,40 @@ def get_analytics_data(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Invalid date range format. Use 'Xd' where X is a number (e.g., '7d')."
         )
-    
-    return analytics_service.get_course_study_days(current_user.id, range_in_days)
\ No newline at end of file
+
+    if not 1 <= range_in_days <= MAX_RANGE_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Date range must be between 1d and {MAX_RANGE_DAYS}d."
+        )
+    return range_in_days
+
+@router.get("", response_model=AnalyticsResponse, status_code=status.HTTP_200_OK)
+async def get_analytics_data(
+    range: str = Query("30d", description="Date range for analytics (e.g., '7d', '30d', '90d')."),
+    analytics_service: AnalyticsService = Depends(get_analytics_service),
+    current_user: User = Depends(get_current_user)
+):
+    range_in_days = parse_range(range)
+    return await analytics_service.get_course_study_days(
+        current_user.id, range_in_days, local_today(current_user.timezone)
+    )
+
+@router.get("/overview", response_model=AnalyticsOverview, response_model_exclude_none=True)
+async def get_analytics_overview(
+    ranges: str = Query("7d,30d,90d", description="Comma-separated date ranges (e.g., '7d,30d,90d')."),
+    series: bool = Query(False, description="Include the per-day course activity over the widest range."),
+    analytics_service: AnalyticsService = Depends(get_analytics_service),
+    current_user: User = Depends(get_current_user)
+):
+    range_values = [value.strip() for value in ranges.split(",") if value.strip()]
+    if not 1 <= len(range_values) <= MAX_WINDOWS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Request between 1 and {MAX_WINDOWS} date ranges."
+        )
+
+    ranges_in_days = tuple(sorted({parse_range(value) for value in range_values}))
+    return await analytics_service.get_study_overview(
+        current_user.id, ranges_in_days, local_today(current_user.timezone), series
+    )
\ No newline at end of file
@@ -1,65 +1,115 @@
 # api/v1/routes/auth.py
 from fastapi import Depends, HTTPException, status, Request, APIRouter
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.responses import RedirectResponse
+from fastapi.security import HTTPAuthorizationCredentials
 from datetime import timedelta
+from typing import Optional
 import os
 
 from ..models.user import User
 from api.db.database import get_db
-from ..schemas.user import UserCreate, UserLogin, UserResponse, Token
-from api.core.google_auth import GoogleAuth
-from api.core.security import get_password_hash, ACCESS_TOKEN_EXPIRE_MINUTES, create_access_token, verify_password, get_current_user
+from ..schemas.user import UserCreate, UserLogin, UserResponse, UserUpdate, Token, MessageResponse, RefreshRequest, LogoutRequest, SignInCodeRequest
+from ..services.refresh_token import RefreshTokenService
+from api.core.cache import result_cache
+from api.core.google_auth import google_auth
+from api.core.security import (
+    get_password_hash_async, ACCESS_TOKEN_EXPIRE_MINUTES, SIGN_IN_CODE_EXPIRE_SECONDS, create_access_token, verify_password_async,
+    get_current_user, get_token_payload, revoke_access_token, security, token_claims, invalidate_cached_user
+)
 
 router = APIRouter()
 
-google_auth = GoogleAuth()
+async def get_refresh_token_service(db: AsyncSession = Depends(get_db)):
+    """Dependency that provides a RefreshTokenService instance."""
+    return RefreshTokenService(db)
+
+async def issue_tokens(user, request: Request, refresh_token_service: RefreshTokenService) -> dict:
+    """An access token plus the first refresh token of a new sign-in from the requesting device."""
+    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    access_token = create_access_token(
+        data=token_claims(user), expires_delta=access_token_expires
+    )
+    refresh_token = await refresh_token_service.issue(user.id, request.headers.get("user-agent"))
+    return {"access_token": access_token, "refresh_token": refresh_token, "token_type": "bearer"}
+
+async def rotate_tokens(token: str, refresh_token_service: RefreshTokenService) -> dict:
+    """Exchanges a refresh token (or sign-in code) for an access token and the next refresh token."""
+    # No password check and no user lookup: the rotation statement returns the user
+    user, refresh_token = await refresh_token_service.rotate(token)
+    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    access_token = create_access_token(
+        data=token_claims(user), expires_delta=access_token_expires
+    )
+    return {"access_token": access_token, "refresh_token": refresh_token, "token_type": "bearer"}
 
 @router.post("/register", response_model=Token)
-async def register_user(user_data: UserCreate, db: Session = Depends(get_db)):
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
+async def register_user(
+    user_data: UserCreate,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    refresh_token_service: RefreshTokenService = Depends(get_refresh_token_service)
+):
+    existing_user = await db.scalar(select(User).where(User.email == user_data.email))
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
-    
-    hashed_password = get_password_hash(user_data.password)
+
+    # Hand the connection back to the pool while bcrypt runs
+    await db.close()
+    hashed_password = await get_password_hash_async(user_data.password)
     db_user = User(
         email=user_data.email,
         username=user_data.username,
         hashed_password=hashed_password,
-        auth_provider="email"
+        auth_provider="email",
+        timezone=user_data.timezone
     )
     
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
-    
-    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": db_user.email}, expires_delta=access_token_expires
-    )
-    
-    return {"access_token": access_token, "token_type": "bearer"}
+    try:
+        await db.commit()
+    except IntegrityError:
+        # A concurrent registration for the same email committed while bcrypt ran
+        await db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already registered"
+        )
+    await db.refresh(db_user)
+
+    return await issue_tokens(db_user, request, refresh_token_service)
 
 @router.post("/login", response_model=Token)
-async def login_user(user_credentials: UserLogin, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == user_credentials.email).first()
+async def login_user(
+    user_credentials: UserLogin,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    refresh_token_service: RefreshTokenService = Depends(get_refresh_token_service)
+):
+    user = await db.scalar(select(User).where(User.email == user_credentials.email))
+    # Hand the connection back to the pool while bcrypt runs
+    await db.close()
     
-    if not user or not verify_password(user_credentials.password, user.hashed_password):
+    if not user or not user.hashed_password or not await verify_password_async(user_credentials.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    
-    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": user.email}, expires_delta=access_token_expires
-    )
-    
-    return {"access_token": access_token, "token_type": "bearer"}
+
+    return await issue_tokens(user, request, refresh_token_service)
+
+@router.post("/refresh", response_model=Token)
+async def refresh_tokens(
+    refresh_request: RefreshRequest,
+    refresh_token_service: RefreshTokenService = Depends(get_refresh_token_service)
+):
+    return await rotate_tokens(refresh_request.refresh_token, refresh_token_service)
 
 @router.get("/google")
 async def google_login(request: Request):
@@ -67,7 +117,11 @@ async def google_login(request: Request):
     return await google_auth.authorize_redirect(request, redirect_uri)
 
 @router.get("/google/callback")
-async def google_callback(request: Request, db: Session = Depends(get_db)):
+async def google_callback(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    refresh_token_service: RefreshTokenService = Depends(get_refresh_token_service)
+):
     try:
         token = await google_auth.authorize_access_token(request)
         user_info = token.get('userinfo')
@@ -75,7 +129,7 @@ async def google_callback(request: Request, db: Session = Depends(get_db)):
         if not user_info:
             raise HTTPException(status_code=400, detail="Failed to get user info from Google")
         
-        user = db.query(User).filter(User.email == user_info['email']).first()
+        user = await db.scalar(select(User).where(User.email == user_info['email']))
         
         if not user:
             user = User(
@@ -86,25 +140,35 @@ async def google_callback(request: Request, db: Session = Depends(get_db)):
                 is_verified=True
             )
             db.add(user)
-            db.commit()
-            db.refresh(user)
+            await db.commit()
+            await db.refresh(user)
         else:
             if not user.google_id:
                 user.google_id = user_info['sub']
                 user.auth_provider = "google"
-                db.commit()
+                await db.commit()
+                invalidate_cached_user(user.email)
 
-        access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-        access_token = create_access_token(
-            data={"sub": user.email}, expires_delta=access_token_expires
+        # No tokens in the URL, where browser history, logs and Referer headers would
+        # keep them: the frontend exchanges this short-lived code at /auth/google/token.
+        code = await refresh_token_service.issue(
+            user.id, request.headers.get("user-agent"), expires_in=timedelta(seconds=SIGN_IN_CODE_EXPIRE_SECONDS)
         )
 
         frontend_url = os.getenv("FRONTEND_URL")
-        return RedirectResponse(url=f"{frontend_url}/auth/callback?access_token={access_token}")
+        return RedirectResponse(url=f"{frontend_url}/auth/callback?code={code}")
         
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Authentication failed: {str(e)}")
 
+@router.post("/google/token", response_model=Token)
+async def google_sign_in_token(
+    code_request: SignInCodeRequest,
+    refresh_token_service: RefreshTokenService = Depends(get_refresh_token_service)
+):
+    """Exchanges the code of a Google sign-in for its token pair. A code works once, within SIGN_IN_CODE_EXPIRE_SECONDS."""
+    return await rotate_tokens(code_request.code, refresh_token_service)
+
 @router.get("/me", response_model=UserResponse)
 async def get_current_user_info(current_user: User = Depends(get_current_user)):
     return UserResponse(
@@ -113,9 +177,43 @@ async def get_current_user_info(current_user: User = Depends(get_current_user)):
         username=current_user.username,
         is_verified=current_user.is_verified,
         auth_provider=current_user.auth_provider,
+        timezone=current_user.timezone,
         created_at=current_user.created_at
     )
 
-@router.post("/logout")
-async def logout_user():
+@router.patch("/me", response_model=UserResponse)
+async def update_current_user_info(
+    user_update: UserUpdate,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    changes = user_update.model_dump(exclude_unset=True, exclude_none=True)
+    if changes:
+        if "timezone" in changes:
+            # Sessions keep the study day they were logged on; only "today" moves.
+            changes["data_version"] = User.data_version + 1
+        await db.execute(
+            update(User).where(User.id == current_user.id).values(**changes)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+        invalidate_cached_user(current_user.email)
+        if "timezone" in changes:
+            await result_cache.invalidate_user(current_user.id)
+
+    user = await db.get(User, current_user.id, populate_existing=True)
+    return UserResponse.model_validate(user)
+
+@router.post("/logout", response_model=MessageResponse)
+async def logout_user(
+    logout_request: Optional[LogoutRequest] = None,
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    payload: dict = Depends(get_token_payload),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+    refresh_token_service: RefreshTokenService = Depends(get_refresh_token_service)
+):
+    if logout_request and logout_request.refresh_token:
+        await refresh_token_service.revoke(logout_request.refresh_token, current_user.id)
+    await revoke_access_token(db, credentials.credentials, payload)
     return {"message": "Successfully logged out"}
\ No newline at end of file
@@ -1,45 +1,70 @@
 # api/v1/routes/dashboard.py
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from typing import Dict, Any, List
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from typing import List
 
-from api.db.database import get_db
+from api.db.database import read_session
 from api.core.security import get_current_user
-from ..services.dashboard import DashboardService
+from api.core.conditional import conditional_get, get_data_version
+from api.core.dates import local_today
+from ..services.dashboard import DashboardService, SNAPSHOT_SECTIONS
 from ..models.user import User
-from ..schemas.dashboard import ChecklistItem
+from ..schemas.dashboard import ChecklistItem, DashboardSnapshot, DashboardSummary, RecentStudySession
 
-router = APIRouter()
+router = APIRouter(dependencies=[Depends(conditional_get)])
 
-def get_dashboard_service(db: Session = Depends(get_db)):
-    """Dependency that provides a DashboardService instance."""
-    return DashboardService(db)
+async def get_dashboard_service(
+    current_user: User = Depends(get_current_user),
+    data_version: int = Depends(get_data_version)
+):
+    """Dependency that provides a DashboardService reading from a replica when one has caught up with the user's writes."""
+    async with read_session(current_user.id, data_version) as db:
+        yield DashboardService(db, data_version)
 
-@router.get("/summary", response_model=Dict[str, Any])
-def get_dashboard_summary(
+@router.get("/summary", response_model=DashboardSummary)
+async def get_dashboard_summary(
     dashboard_service: DashboardService = Depends(get_dashboard_service), 
     current_user: User = Depends(get_current_user)
 ):
-    total_study_days = dashboard_service.get_total_study_days(current_user.id)
-    current_streak = dashboard_service.get_current_streak(current_user.id)
-    most_studied_course = dashboard_service.get_most_studied_course(current_user.id)
+    total_study_days = await dashboard_service.get_total_study_days(current_user.id)
+    streaks = await dashboard_service.get_streaks(current_user.id, local_today(current_user.timezone))
+    most_studied_course = await dashboard_service.get_most_studied_course(current_user.id)
     
     return {
         "total_study_days": total_study_days,
-        "current_streak": current_streak,
+        "current_streak": streaks["current_streak"],
+        "longest_streak": streaks["longest_streak"],
         "most_studied_course": most_studied_course,
     }
 
 @router.get("/checklist", response_model=List[ChecklistItem])
-def get_dashboard_checklist(
+async def get_dashboard_checklist(
+    dashboard_service: DashboardService = Depends(get_dashboard_service),
+    current_user: User = Depends(get_current_user)
+):
+    return await dashboard_service.get_checklist_items(current_user.id)
+
+@router.get("/recent/course", response_model=List[RecentStudySession])
+async def get_recent_courses_endpoint(
     dashboard_service: DashboardService = Depends(get_dashboard_service),
     current_user: User = Depends(get_current_user)
 ):
-    return dashboard_service.get_checklist_items(current_user.id)
+    return await dashboard_service.get_recent_study_sessions(current_user.id)
 
-@router.get("/recent/course", response_model=List[Dict[str, Any]])
-def get_recent_courses_endpoint(
+@router.get("/snapshot", response_model=DashboardSnapshot, response_model_exclude_unset=True)
+async def get_dashboard_snapshot(
+    sections: str = Query(
+        ",".join(SNAPSHOT_SECTIONS),
+        description="Comma-separated sections to include (summary, checklist, recent_sessions).",
+    ),
     dashboard_service: DashboardService = Depends(get_dashboard_service),
     current_user: User = Depends(get_current_user)
 ):
-    return dashboard_service.get_recent_study_sessions(current_user.id)
\ No newline at end of file
+    requested = {section.strip() for section in sections.split(",") if section.strip()}
+    unknown = requested - set(SNAPSHOT_SECTIONS)
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown dashboard section(s): {', '.join(sorted(unknown))}."
+        )
+
+    return await dashboard_service.get_snapshot(current_user.id, local_today(current_user.timezone), requested)
\ No newline at end of file
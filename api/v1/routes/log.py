@@ -1,24 +1,124 @@
-# api/v1/routes/log.py
-from fastapi import APIRouter, Depends, status
-from sqlalchemy.orm import Session
-from typing import Dict, Any
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import date
+from typing import Optional
 
-from api.db.database import get_db
+from api.db.database import get_db, read_session, AsyncSessionLocal
 from ..schemas.course import LogCoursesRequest
+from ..schemas.log import ImportResponse, LogResponse, StudySessionHistoryPage
 from ..services.log import LogService
+from ..services.log_queue import log_queue
+from ..services.history import HistoryService, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from ..services.export import ExportService, EXPORT_MEDIA_TYPES
+from ..services.importer import ImportService, IMPORT_FORMATS, iter_lines
+from api.core.dates import local_today
 from api.core.security import get_current_user
+from api.core.conditional import conditional_get, get_data_version
 from ..models.user import User
 
 router = APIRouter()
 
-def get_log_service(db: Session = Depends(get_db)):
+async def get_log_service(db: AsyncSession = Depends(get_db)):
     """Dependency that provides a LogService instance."""
     return LogService(db)
 
-@router.post("", status_code=status.HTTP_200_OK, response_model=Dict[str, Any])
-def log_study_sessions_endpoint(
+async def get_history_service(
+    current_user: User = Depends(get_current_user),
+    data_version: int = Depends(get_data_version)
+):
+    """Dependency that provides a HistoryService reading from a replica when one has caught up with the user's writes."""
+    async with read_session(current_user.id, data_version) as db:
+        yield HistoryService(db)
+
+async def get_import_service(db: AsyncSession = Depends(get_db)):
+    """Dependency that provides an ImportService instance."""
+    return ImportService(db)
+
+async def get_export_service():
+    """Dependency that provides an ExportService; it opens its own session while streaming."""
+    return ExportService(AsyncSessionLocal)
+
+@router.post(
+    "",
+    status_code=status.HTTP_200_OK,
+    response_model=LogResponse,
+    responses={status.HTTP_202_ACCEPTED: {"model": LogResponse, "description": "Queued for logging (LOG_INGEST_ACK=accept)."}},
+)
+async def log_study_sessions_endpoint(
     log_request: LogCoursesRequest,
     log_service: LogService = Depends(get_log_service),
     current_user: User = Depends(get_current_user)
 ):
-    return log_service.log_study_sessions(current_user.id, log_request)
\ No newline at end of file
+    if not log_queue.enabled:
+        return await log_service.log_study_sessions(current_user.id, log_request, current_user.timezone)
+
+    # Queued ingestion: validate now, write later in one batch with other users' logs.
+    entry = await log_service.prepare_log_entry(current_user.id, log_request, current_user.timezone)
+    logged_courses = await log_queue.submit(entry)
+    if logged_courses is None:
+        return ORJSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content={"message": "Study sessions accepted for logging.", "logged_courses": None},
+        )
+    return {"message": "Study sessions logged successfully.", "logged_courses": logged_courses}
+
+@router.post("/import", status_code=status.HTTP_200_OK, response_model=ImportResponse)
+async def import_study_sessions_endpoint(
+    request: Request,
+    format: str = Query("ndjson", description="Body format: 'ndjson' or 'csv', with course_name and date fields."),
+    import_service: ImportService = Depends(get_import_service),
+    current_user: User = Depends(get_current_user)
+):
+    if format not in IMPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported import format '{format}'. Use 'ndjson' or 'csv'."
+        )
+    # The body is parsed as it arrives, so large files are never held in memory.
+    return await import_service.import_study_sessions(
+        current_user.id, iter_lines(request.stream()), format, current_user.timezone
+    )
+
+@router.get(
+    "/history",
+    response_model=StudySessionHistoryPage,
+    dependencies=[Depends(conditional_get)],
+)
+async def get_study_history_endpoint(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE, description="Page size."),
+    cursor: Optional[str] = Query(None, description="The next_cursor of the previous page."),
+    course: Optional[str] = Query(None, description="Only sessions of the course with this name."),
+    start_date: Optional[date] = Query(None, description="Only sessions on or after this day, in the user's timezone."),
+    end_date: Optional[date] = Query(None, description="Only sessions on or before this day, in the user's timezone."),
+    history_service: HistoryService = Depends(get_history_service),
+    current_user: User = Depends(get_current_user)
+):
+    if start_date and end_date and start_date > end_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start_date must not be after end_date."
+        )
+    return await history_service.get_study_history(
+        current_user.id, limit, cursor, course, start_date, end_date, current_user.timezone
+    )
+
+@router.get("/export", response_class=StreamingResponse)
+async def export_study_sessions_endpoint(
+    format: str = Query("ndjson", description="Export format: 'ndjson' or 'csv'."),
+    export_service: ExportService = Depends(get_export_service),
+    current_user: User = Depends(get_current_user)
+):
+    if format not in EXPORT_MEDIA_TYPES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unsupported export format '{format}'. Use 'ndjson' or 'csv'."
+        )
+    return StreamingResponse(
+        export_service.stream_study_sessions(current_user.id, format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition": f'attachment; filename="trak-study-sessions-{local_today(current_user.timezone)}.{format}"',
+            "Cache-Control": "no-store",
+        },
+    )
@@ -1,6 +1,6 @@
 # api/v1/schemas/analytics.py
 from pydantic import BaseModel, Field
-from typing import List
+from typing import List, Optional
 from datetime import date
 
 class CourseStudyDays(BaseModel):
@@ -11,4 +11,20 @@ class AnalyticsResponse(BaseModel):
     course_study_data: List[CourseStudyDays]
     range_in_days: int
     start_date: date
-    end_date: date
\ No newline at end of file
+    end_date: date
+
+class AnalyticsWindow(BaseModel):
+    range_in_days: int
+    start_date: date
+    end_date: date
+    course_study_data: List[CourseStudyDays]
+
+class DailyStudyActivity(BaseModel):
+    date: date
+    course_names: List[str] = Field(..., description="The courses studied on this day.")
+
+class AnalyticsOverview(BaseModel):
+    windows: List[AnalyticsWindow]
+    daily_series: Optional[List[DailyStudyActivity]] = Field(
+        None, description="Per-day study activity over the widest window, oldest first."
+    )
\ No newline at end of file
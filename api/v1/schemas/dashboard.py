@@ -1,13 +1,27 @@
 # api/v1/schemas/dashboard.py
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Optional
+from typing import Optional, List
+
+class MostStudiedCourse(BaseModel):
+    name: str
+    days: int
 
 class DashboardSummary(BaseModel):
     total_study_days: int
     current_streak: int
-    most_studied_course: Optional[dict]
+    longest_streak: int
+    most_studied_course: Optional[MostStudiedCourse]
 
 class ChecklistItem(BaseModel):
     course_name: str
-    last_studied_at: Optional[datetime]
\ No newline at end of file
+    last_studied_at: Optional[datetime]
+
+class RecentStudySession(BaseModel):
+    date: datetime
+    course_name: str
+
+class DashboardSnapshot(BaseModel):
+    summary: Optional[DashboardSummary] = None
+    checklist: Optional[List[ChecklistItem]] = None
+    recent_sessions: Optional[List[RecentStudySession]] = None
\ No newline at end of file
@@ -0,0 +1,19 @@
+# api/v1/schemas/health.py
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List
+
+class ReadinessResponse(BaseModel):
+    status: str = "ready"
+    pool: Dict[str, Any]
+    replicas: List[Dict[str, Any]]
+    user_cache: Dict[str, Any]
+    token_cache: Dict[str, Any]
+    result_cache: Dict[str, Any]
+    password_hashing: Dict[str, Any]
+    log_ingest: Dict[str, Any]
+    google_oidc: Dict[str, Any]
+
+class ReadinessFailure(BaseModel):
+    status: str = "unavailable"
+    detail: str = Field(..., description="Why the database could not be reached.")
+    pool: Dict[str, Any]
@@ -0,0 +1,29 @@
+# api/v1/schemas/log.py
+from pydantic import BaseModel, Field
+from datetime import datetime
+from typing import List, Optional
+import uuid
+
+class LogResponse(BaseModel):
+    message: str
+    logged_courses: Optional[List[str]] = Field(
+        ..., description="Courses logged for the first time today; null when the log was only queued."
+    )
+
+class ImportResponse(BaseModel):
+    message: str
+    rows: int
+    imported: int
+    skipped_duplicates: int
+    created_courses: List[str]
+
+class StudySessionHistoryItem(BaseModel):
+    id: uuid.UUID
+    date: datetime
+    course_name: str
+
+class StudySessionHistoryPage(BaseModel):
+    items: List[StudySessionHistoryItem]
+    next_cursor: Optional[str] = Field(
+        None, description="Pass as `cursor` to fetch the next (older) page; null on the last page."
+    )
@@ -1,11 +1,28 @@
 import uuid
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field, field_validator
 from datetime import datetime
+from typing import Optional
+
+from api.core.dates import DEFAULT_TIMEZONE, is_valid_timezone
+
+def _check_timezone(value: Optional[str]) -> Optional[str]:
+    if value is not None and not is_valid_timezone(value):
+        raise ValueError("Unknown timezone; use an IANA name such as 'Europe/Berlin'.")
+    return value
 
 class UserCreate(BaseModel):
     email: EmailStr
     username: str
     password: str
+    timezone: str = Field(DEFAULT_TIMEZONE, description="IANA timezone that study days are counted in.")
+
+    _validate_timezone = field_validator("timezone")(_check_timezone)
+
+class UserUpdate(BaseModel):
+    username: Optional[str] = Field(None, min_length=1)
+    timezone: Optional[str] = Field(None, description="IANA timezone that study days are counted in.")
+
+    _validate_timezone = field_validator("timezone")(_check_timezone)
 
 class UserLogin(BaseModel):
     email: EmailStr
@@ -17,6 +34,7 @@ class UserResponse(BaseModel):
     username: str
     is_verified: bool
     auth_provider: str
+    timezone: str
     created_at: datetime
     
     class Config:
@@ -24,4 +42,17 @@ class UserResponse(BaseModel):
 
 class Token(BaseModel):
     access_token: str
-    token_type: str
\ No newline at end of file
+    token_type: str
+    refresh_token: Optional[str] = Field(None, description="Exchange at /auth/refresh for a new token pair; single use.")
+
+class RefreshRequest(BaseModel):
+    refresh_token: str
+
+class SignInCodeRequest(BaseModel):
+    code: str = Field(..., description="The code the Google sign-in redirected to the frontend with; single use.")
+
+class LogoutRequest(BaseModel):
+    refresh_token: Optional[str] = Field(None, description="Also revoke this refresh token and its rotations.")
+
+class MessageResponse(BaseModel):
+    message: str
\ No newline at end of file
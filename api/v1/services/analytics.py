@@ -1,59 +1,132 @@
 # api/v1/services/analytics.py
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select
 from datetime import date, timedelta
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence
+import os
 
-from ..models.study_session import StudySession
+from api.core.cache import cached
+from api.core.instrumentation import instrument_service
+from ..models.study_day import StudyDay
 from ..models.course import Course
-from ..schemas.analytics import CourseStudyDays, AnalyticsResponse
 
+# Longest range a single analytics request may cover.
+MAX_RANGE_DAYS = int(os.getenv("ANALYTICS_MAX_RANGE_DAYS", "366"))
+MAX_WINDOWS = 10
+
+@instrument_service
 class AnalyticsService:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession, data_version: Optional[int] = None):
         self.db = db
+        # The user's users.data_version, part of every cached result's key
+        self.data_version = data_version
 
-    def get_course_study_days(self, user_id: str, range_in_days: int) -> AnalyticsResponse:
+    @cached
+    async def get_course_study_days(self, user_id: str, range_in_days: int, today: date) -> Dict[str, Any]:
         """
         Retrieves the number of study days per course for a user over a given date range.
 
         Args:
             user_id (str): The ID of the user.
             range_in_days (int): The number of days to look back.
+            today (date): The user's current local day, the last day of the range.
 
         Returns:
-            AnalyticsResponse: A Pydantic model containing the aggregated study data by course.
+            Dict[str, Any]: The aggregated study data by course, in the shape of AnalyticsResponse.
         """
-        end_date = date.today()
+        end_date = today
         start_date = end_date - timedelta(days=range_in_days - 1)
         
-        # Query to count the number of unique study days for each course
+        # Count the number of study days for each course from the daily rollup
+        study_days_count = func.count(func.distinct(StudyDay.day))
         study_data = (
-            self.db.query(
-                Course.name.label("course_name"),
-                func.count(func.distinct(func.date(StudySession.date))).label("study_days_count")
-            )
-            .join(StudySession, StudySession.course_id == Course.id)
-            .filter(
-                StudySession.user_id == user_id,
-                func.date(StudySession.date) >= start_date,
-                func.date(StudySession.date) <= end_date
+            await self.db.execute(
+                select(
+                    Course.name.label("course_name"),
+                    study_days_count.label("study_days_count")
+                )
+                .join(StudyDay, StudyDay.course_id == Course.id)
+                .where(
+                    StudyDay.user_id == user_id,
+                    StudyDay.day >= start_date,
+                    StudyDay.day <= end_date
+                )
+                .group_by(Course.name)
+                .order_by(study_days_count.desc())
             )
-            .group_by(Course.name)
-            .order_by(func.count(func.distinct(func.date(StudySession.date))).desc())
-            .all()
-        )
-        
-        # Format the data into a list of CourseStudyDays
-        course_data = [
-            CourseStudyDays(
-                course_name=row.course_name,
-                study_days=row.study_days_count
+        ).all()
+
+        # Plain dicts in the shape of the schema; the route's response_model validates them once.
+        return {
+            "course_study_data": [
+                {"course_name": row.course_name, "study_days": row.study_days_count}
+                for row in study_data
+            ],
+            "range_in_days": range_in_days,
+            "start_date": start_date,
+            "end_date": end_date,
+        }
+
+    @cached
+    async def get_study_overview(self, user_id: str, ranges: Sequence[int], today: date, include_series: bool = False) -> Dict[str, Any]:
+        """
+        Retrieves per-course study days for several look-back windows at once.
+
+        All windows are computed from one scan of the widest window: each rollup row
+        is counted towards every window that contains its day.
+
+        Args:
+            user_id (str): The ID of the user.
+            ranges (Sequence[int]): The look-back windows, in days.
+            today (date): The user's current local day, the last day of every window.
+            include_series (bool): Whether to also return the courses studied on each day.
+
+        Returns:
+            Dict[str, Any]: Per-window course totals and, optionally, the daily series, in the shape of AnalyticsOverview.
+        """
+        end_date = today
+        ranges = sorted(set(ranges))
+        start_dates = {range_in_days: end_date - timedelta(days=range_in_days - 1) for range_in_days in ranges}
+        earliest = min(start_dates.values())
+
+        rows = (
+            await self.db.execute(
+                select(StudyDay.day, Course.name)
+                .join(Course, StudyDay.course_id == Course.id)
+                .where(
+                    StudyDay.user_id == user_id,
+                    StudyDay.day >= earliest,
+                    StudyDay.day <= end_date
+                )
+                .order_by(StudyDay.day, Course.name)
             )
-            for row in study_data
+        ).all()
+
+        counts = {range_in_days: Counter() for range_in_days in ranges}
+        daily_series: List[Dict[str, Any]] = []
+        for day, course_name in rows:
+            for range_in_days, start_date in start_dates.items():
+                if day >= start_date:
+                    counts[range_in_days][course_name] += 1
+
+            if include_series:
+                if daily_series and daily_series[-1]["date"] == day:
+                    daily_series[-1]["course_names"].append(course_name)
+                else:
+                    daily_series.append({"date": day, "course_names": [course_name]})
+
+        windows = [
+            {
+                "range_in_days": range_in_days,
+                "start_date": start_dates[range_in_days],
+                "end_date": end_date,
+                "course_study_data": [
+                    {"course_name": course_name, "study_days": study_days}
+                    for course_name, study_days in sorted(counts[range_in_days].items(), key=lambda item: (-item[1], item[0]))
+                ],
+            }
+            for range_in_days in ranges
         ]
-            
-        return AnalyticsResponse(
-            course_study_data=course_data,
-            range_in_days=range_in_days,
-            start_date=start_date,
-            end_date=end_date
-        )
\ No newline at end of file
+
+        return {"windows": windows, "daily_series": daily_series if include_series else None}
\ No newline at end of file
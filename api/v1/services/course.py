@@ -1,68 +1,97 @@
-from sqlalchemy.orm import Session
+import uuid
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, status
 from sqlalchemy.exc import IntegrityError
 from typing import List
 
+from api.core.cache import result_cache
+from api.core.conditional import bump_data_version
+from api.core.instrumentation import instrument_service
+
 from ..schemas.course import CourseCreate
 from ..models.course import Course
 from ..models.user_course import UserCourse
 
 
+@instrument_service
 class CourseService:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
 
-    def create_courses(self, user_id: str, course_names: List[CourseCreate]) -> List[Course]:
-        """Creates multiple courses and links them to the user via UserCourse."""
-        created_courses = []
+    async def create_courses(self, user_id: str, course_names: List[CourseCreate]) -> List[Course]:
+        """
+        Creates multiple courses and links them to the user via UserCourse.
 
-        try:
-            for course in course_names:
-                course_name = course.name.strip()
-
-                # Skip empty names
-                if not course_name:
-                    continue
-
-                existing_course = (
-                    self.db.query(Course)
-                    .join(UserCourse)
-                    .filter(Course.name == course_name, UserCourse.user_id == user_id)
-                    .first()
+        The whole payload is created in one transaction: if any name is a duplicate,
+        either within the payload or of an existing course, nothing is created.
+        """
+        names = []
+        for course in course_names:
+            course_name = course.name.strip()
+
+            # Skip empty names
+            if not course_name:
+                continue
+
+            if course_name in names:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail=f"Course with name '{course_name}' appears more than once in the request."
                 )
-                if existing_course:
-                    raise HTTPException(
-                        status_code=status.HTTP_409_CONFLICT,
-                        detail=f"Course with name '{course_name}' already exists."
-                    )
+            names.append(course_name)
 
-                db_course = Course(name=course_name)
-                self.db.add(db_course)
-                self.db.commit()
-                self.db.refresh(db_course)
+        if not names:
+            return []
 
-                user_course = UserCourse(user_id=user_id, course_id=db_course.id)
-                self.db.add(user_course)
-                self.db.commit()
-                self.db.refresh(user_course)
+        try:
+            # Serialise course creation per user so two concurrent requests
+            # cannot both pass the duplicate check for the same name.
+            await self.db.execute(select(func.pg_advisory_xact_lock(func.hashtext(str(user_id)))))
 
-                created_courses.append(db_course)
+            existing_course = await self.db.scalar(
+                select(Course.name)
+                .join(UserCourse)
+                .where(Course.name.in_(names), UserCourse.user_id == user_id)
+                .limit(1)
+            )
+            if existing_course:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail=f"Course with name '{existing_course}' already exists."
+                )
+
+            created_courses = (
+                await self.db.scalars(
+                    insert(Course).returning(Course, sort_by_parameter_order=True),
+                    [{"id": uuid.uuid4(), "name": course_name} for course_name in names],
+                )
+            ).all()
+
+            await self.db.execute(
+                insert(UserCourse),
+                [{"user_id": user_id, "course_id": course.id} for course in created_courses],
+            )
+            await self.db.execute(bump_data_version(user_id))
+            await self.db.commit()
+            await result_cache.invalidate_user(user_id)
 
             return created_courses
 
         except IntegrityError:
-            self.db.rollback()
+            await self.db.rollback()
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Database error while creating course."
             )
 
-    def retrieve_all_courses(self, user_id: str) -> List[Course]:
+    async def retrieve_all_courses(self, user_id: str) -> List[Course]:
         """Retrieves all courses for a given user."""
         return (
-        self.db.query(Course)
-        .join(UserCourse, UserCourse.course_id == Course.id)
-        .filter(UserCourse.user_id == user_id)
-        .order_by(Course.name)
-        .all()
-    )
+        await self.db.scalars(
+            select(Course)
+            .join(UserCourse, UserCourse.course_id == Course.id)
+            .where(UserCourse.user_id == user_id)
+            .order_by(Course.name)
+        )
+    ).all()
@@ -1,66 +1,73 @@
 # api/v1/services/dashboard.py
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import date, timedelta
-from sqlalchemy import func
-from typing import List, Dict, Any
+from sqlalchemy import JSON, func, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from typing import List, Dict, Any, Iterable, Optional
 
+from api.core.cache import cached
+from api.core.instrumentation import instrument_service
 from ..models.study_session import StudySession
 from ..models.course import Course
 from ..models.user_course import UserCourse
-from ..schemas.dashboard import ChecklistItem
+from ..models.study_day import StudyDay
+from ..models.user_streak import UserStreak
 
+SNAPSHOT_SECTIONS = ("summary", "checklist", "recent_sessions")
+
+@instrument_service
 class DashboardService:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession, data_version: Optional[int] = None):
         self.db = db
+        # The user's users.data_version, part of every cached result's key
+        self.data_version = data_version
 
-    def get_total_study_days(self, user_id: str):
+    @cached
+    async def get_total_study_days(self, user_id: str):
         """Calculates the total number of unique days a user has studied."""
-        total_days = (
-            self.db.query(func.count(func.distinct(func.date(StudySession.date))))
-            .filter(StudySession.user_id == user_id)
-            .scalar()
+        total_days = await self.db.scalar(
+            select(func.count(func.distinct(StudyDay.day)))
+            .where(StudyDay.user_id == user_id)
         )
         return total_days if total_days is not None else 0
     
-    def get_current_streak(self, user_id: str):
-        """Calculates the current consecutive study day streak."""
-        today = date.today()
-        
-        study_dates = (
-            self.db.query(func.date(StudySession.date))
-            .filter(StudySession.user_id == user_id)
-            .distinct()
-            .order_by(func.date(StudySession.date).desc())
-            .all()
-        )
-        
-        study_dates = {d[0] for d in study_dates}
-        
-        if not study_dates:
+    @cached
+    async def get_streaks(self, user_id: str, today: date) -> Dict[str, int]:
+        """Returns the current and longest consecutive study day streaks as of the user's local today."""
+        streak = (
+            await self.db.execute(
+                select(UserStreak.current_streak, UserStreak.longest_streak, UserStreak.last_study_day)
+                .where(UserStreak.user_id == user_id)
+            )
+        ).first()
+
+        if not streak:
+            return {"current_streak": 0, "longest_streak": 0}
+
+        return {
+            "current_streak": self._live_streak(streak.current_streak, streak.last_study_day, today),
+            "longest_streak": streak.longest_streak,
+        }
+
+    @staticmethod
+    def _live_streak(current_streak: int, last_study_day: Optional[date], today: date) -> int:
+        """The stored streak is still alive if the user studied today or yesterday."""
+        if last_study_day is None or last_study_day < today - timedelta(days=1):
             return 0
-        
-        current_date = today
-        if current_date not in study_dates:
-            current_date = today - timedelta(days=1)
-            if current_date not in study_dates:
-                return 0
-
-        streak = 0
-        while current_date in study_dates:
-            streak += 1
-            current_date -= timedelta(days=1)
-            
-        return streak
+        return current_streak
     
-    def get_most_studied_course(self, user_id: str):
+    @cached
+    async def get_most_studied_course(self, user_id: str):
         """Finds the course the user has studied the most and its total days."""
         most_studied = (
-            self.db.query(Course.name, UserCourse.total_study_days)
-            .join(UserCourse)
-            .filter(UserCourse.user_id == user_id, UserCourse.total_study_days > 0)
-            .order_by(UserCourse.total_study_days.desc())
-            .first()
-        )
+            await self.db.execute(
+                select(Course.name, UserCourse.total_study_days)
+                .join(UserCourse)
+                .where(UserCourse.user_id == user_id, UserCourse.total_study_days > 0)
+                .order_by(UserCourse.total_study_days.desc())
+                .limit(1)
+            )
+        ).first()
         if most_studied:
             return {
                 "name": most_studied.name,
@@ -68,37 +75,116 @@ class DashboardService:
             }
         return None
     
-    def get_checklist_items(self, user_id: str) -> List[ChecklistItem]:
-        """Retrieves the list of courses for the user with their last studied date."""
+    @cached
+    async def get_checklist_items(self, user_id: str) -> List[Dict[str, Any]]:
+        """Retrieves the list of courses for the user with their last studied date, as ChecklistItem dicts."""
         checklist_data = (
-            self.db.query(Course.name, UserCourse.last_studied_at)
-            .join(UserCourse)
-            .filter(UserCourse.user_id == user_id)
-            .order_by(Course.name)
-            .all()
-        )
-        
-        # Convert the query results into a list of ChecklistItem objects
+            await self.db.execute(
+                select(Course.name, UserCourse.last_studied_at)
+                .join(UserCourse)
+                .where(UserCourse.user_id == user_id)
+                .order_by(Course.name)
+            )
+        ).all()
+
+        # Plain dicts: the route's response_model validates them once, which is
+        # cheaper than building a model per row and validating again.
         return [
-            ChecklistItem(course_name=name, last_studied_at=last_studied_at)
+            {"course_name": name, "last_studied_at": last_studied_at}
             for name, last_studied_at in checklist_data
         ]
 
-    def get_recent_study_sessions(self, user_id: str, limit: int = 5) -> List[Dict[str, Any]]:
+    @cached
+    async def get_recent_study_sessions(self, user_id: str, limit: int = 5) -> List[Dict[str, Any]]:
         """
-        Retrieves a list of the most recent study sessions for a user.
+        Retrieves a list of the most recent study sessions for a user, as RecentStudySession dicts.
         """
         recent_sessions = (
-            self.db.query(StudySession.date, Course.name)
-            .join(Course, StudySession.course_id == Course.id)
-            .filter(StudySession.user_id == user_id)
-            .order_by(StudySession.date.desc())
-            .limit(limit)
-            .all()
-        )
+            await self.db.execute(
+                select(StudySession.date, Course.name)
+                .join(Course, StudySession.course_id == Course.id)
+                .where(StudySession.user_id == user_id)
+                .order_by(StudySession.date.desc())
+                .limit(limit)
+            )
+        ).all()
 
-        # Format the results into a list of dictionaries
         return [
             {"date": session_date, "course_name": course_name}
             for session_date, course_name in recent_sessions
-        ]
\ No newline at end of file
+        ]
+
+    @cached
+    async def get_snapshot(self, user_id: str, today: date, sections: Iterable[str] = SNAPSHOT_SECTIONS, recent_limit: int = 5) -> Dict[str, Any]:
+        """
+        Builds the requested dashboard sections, in the shape of DashboardSnapshot, with a single SELECT.
+
+        Each section is a scalar subquery of the same statement; list sections are
+        aggregated to JSON in the database so the whole snapshot is one round trip.
+        """
+        sections = set(sections)
+        columns = []
+
+        if "summary" in sections:
+            most_studied = (
+                select(func.json_build_object("name", Course.name, "days", UserCourse.total_study_days, type_=JSON))
+                .join(UserCourse)
+                .where(UserCourse.user_id == user_id, UserCourse.total_study_days > 0)
+                .order_by(UserCourse.total_study_days.desc())
+                .limit(1)
+            )
+            columns += [
+                select(func.count(func.distinct(StudyDay.day)))
+                .where(StudyDay.user_id == user_id)
+                .scalar_subquery().label("total_study_days"),
+                select(UserStreak.current_streak).where(UserStreak.user_id == user_id)
+                .scalar_subquery().label("current_streak"),
+                select(UserStreak.longest_streak).where(UserStreak.user_id == user_id)
+                .scalar_subquery().label("longest_streak"),
+                select(UserStreak.last_study_day).where(UserStreak.user_id == user_id)
+                .scalar_subquery().label("last_study_day"),
+                most_studied.scalar_subquery().label("most_studied_course"),
+            ]
+
+        if "checklist" in sections:
+            checklist_item = func.json_build_object("course_name", Course.name, "last_studied_at", UserCourse.last_studied_at)
+            columns.append(
+                select(func.json_agg(aggregate_order_by(checklist_item, Course.name), type_=JSON))
+                .join(UserCourse)
+                .where(UserCourse.user_id == user_id)
+                .scalar_subquery().label("checklist")
+            )
+
+        if "recent_sessions" in sections:
+            recent = (
+                select(StudySession.date, Course.name.label("course_name"))
+                .join(Course, StudySession.course_id == Course.id)
+                .where(StudySession.user_id == user_id)
+                .order_by(StudySession.date.desc())
+                .limit(recent_limit)
+                .subquery()
+            )
+            recent_item = func.json_build_object("date", recent.c.date, "course_name", recent.c.course_name)
+            columns.append(
+                select(func.json_agg(aggregate_order_by(recent_item, recent.c.date.desc()), type_=JSON))
+                .scalar_subquery().label("recent_sessions")
+            )
+
+        if not columns:
+            return {}
+
+        row = (await self.db.execute(select(*columns))).one()._mapping
+
+        snapshot = {}
+        if "summary" in sections:
+            snapshot["summary"] = {
+                "total_study_days": row["total_study_days"] or 0,
+                "current_streak": self._live_streak(row["current_streak"] or 0, row["last_study_day"], today),
+                "longest_streak": row["longest_streak"] or 0,
+                "most_studied_course": row["most_studied_course"],
+            }
+        if "checklist" in sections:
+            snapshot["checklist"] = row["checklist"] or []
+        if "recent_sessions" in sections:
+            snapshot["recent_sessions"] = row["recent_sessions"] or []
+        return snapshot
@@ -0,0 +1,107 @@
+# api/v1/services/history.py
+import base64
+import binascii
+import os
+import uuid
+from datetime import date, datetime, timedelta
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.core.dates import DEFAULT_TIMEZONE, local_day_start
+from api.core.instrumentation import instrument_service
+from ..models.course import Course
+from ..models.study_session import StudySession
+from ..models.user_course import UserCourse
+from ..schemas.log import StudySessionHistoryItem, StudySessionHistoryPage
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = int(os.getenv("HISTORY_MAX_PAGE_SIZE", "100"))
+
+
+def encode_cursor(session_date: datetime, session_id: uuid.UUID) -> str:
+    """Opaque cursor pointing just past the given (date, id) key."""
+    raw = f"{session_date.isoformat()}|{session_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        session_date, session_id = raw.split("|")
+        return datetime.fromisoformat(session_date), uuid.UUID(session_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid history cursor."
+        )
+
+
+@instrument_service
+class HistoryService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def get_study_history(
+        self,
+        user_id: str,
+        limit: int = DEFAULT_PAGE_SIZE,
+        cursor: Optional[str] = None,
+        course_name: Optional[str] = None,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        tz_name: str = DEFAULT_TIMEZONE,
+    ) -> StudySessionHistoryPage:
+        """
+        Returns one page of the user's study sessions, newest first.
+
+        Pages are keyed on (date, id) rather than OFFSET, so every page is a range
+        scan of the (user_id, [course_id,] date, id) index and costs the same
+        however deep into the history it is. start_date and end_date are days in
+        the user's timezone (tz_name).
+        """
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+        query = (
+            select(StudySession.id, StudySession.date, Course.name)
+            .join(Course, StudySession.course_id == Course.id)
+            .where(StudySession.user_id == user_id)
+        )
+
+        if course_name is not None:
+            # Resolved once by the planner, so the scan stays on the per-course index.
+            query = query.where(
+                StudySession.course_id == (
+                    select(Course.id)
+                    .join(UserCourse)
+                    .where(UserCourse.user_id == user_id, Course.name == course_name.strip())
+                    .limit(1)
+                    .scalar_subquery()
+                )
+            )
+        if start_date is not None:
+            query = query.where(StudySession.date >= local_day_start(start_date, tz_name))
+        if end_date is not None:
+            query = query.where(StudySession.date < local_day_start(end_date + timedelta(days=1), tz_name))
+        if cursor is not None:
+            query = query.where(tuple_(StudySession.date, StudySession.id) < decode_cursor(cursor))
+
+        # One extra row tells us whether there is a next page.
+        rows = (
+            await self.db.execute(
+                query.order_by(StudySession.date.desc(), StudySession.id.desc()).limit(limit + 1)
+            )
+        ).all()
+
+        items = [
+            StudySessionHistoryItem(id=session_id, date=session_date, course_name=name)
+            for session_id, session_date, name in rows[:limit]
+        ]
+        next_cursor = None
+        if len(rows) > limit:
+            last = items[-1]
+            next_cursor = encode_cursor(last.date, last.id)
+
+        return StudySessionHistoryPage(items=items, next_cursor=next_cursor)
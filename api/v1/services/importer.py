@@ -0,0 +1,261 @@
+# api/v1/services/importer.py
+import codecs
+import csv
+import json
+import os
+import tempfile
+import uuid
+from datetime import date, datetime, timezone
+from typing import IO, AsyncIterable, AsyncIterator, Dict, List, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.core.cache import result_cache
+from api.core.conditional import bump_data_version
+from api.core.dates import DEFAULT_TIMEZONE, local_day, local_day_start, local_today
+from api.core.instrumentation import instrument_service
+
+from ..models.course import Course
+from ..models.study_session import StudySession
+from ..models.user_course import UserCourse
+from .rollup import RollupService
+
+IMPORT_FORMATS = ("ndjson", "csv")
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "5000"))
+IMPORT_MAX_ROWS = int(os.getenv("IMPORT_MAX_ROWS", "200000"))
+# Parsed rows are kept in memory up to this size while the body is read, then on disk.
+IMPORT_SPOOL_MEMORY_BYTES = int(os.getenv("IMPORT_SPOOL_MEMORY_BYTES", str(4 * 1024 * 1024)))
+COURSE_NAME_MAX_LENGTH = 100
+
+
+async def iter_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    """Splits a stream of UTF-8 byte chunks into text lines without reading it all."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+
+def _invalid(line_number: int, detail: str) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Line {line_number}: {detail}")
+
+
+def _parse_studied_at(value, line_number: int, tz_name: str) -> Tuple[datetime, date]:
+    """
+    Returns the session timestamp and its study day in the user's timezone.
+
+    Accepts an ISO date (a day in the user's timezone, stored as its local midnight)
+    or an ISO timestamp; timestamps without an offset are taken as UTC.
+    """
+    if not isinstance(value, str) or not value.strip():
+        raise _invalid(line_number, "missing date.")
+    value = value.strip()
+    try:
+        if len(value) == 10:
+            study_day = date.fromisoformat(value)
+            studied_at = local_day_start(study_day, tz_name)
+        else:
+            studied_at = datetime.fromisoformat(value)
+            if studied_at.tzinfo is None:
+                studied_at = studied_at.replace(tzinfo=timezone.utc)
+            study_day = local_day(studied_at, tz_name)
+    except ValueError:
+        raise _invalid(line_number, f"invalid date '{value}'.")
+
+    if study_day > local_today(tz_name):
+        raise _invalid(line_number, f"date '{value}' is in the future.")
+    return studied_at, study_day
+
+
+def _parse_course_name(value, line_number: int) -> str:
+    if not isinstance(value, str) or not value.strip():
+        raise _invalid(line_number, "missing course_name.")
+    if len(value.strip()) > COURSE_NAME_MAX_LENGTH:
+        raise _invalid(line_number, f"course_name is longer than {COURSE_NAME_MAX_LENGTH} characters.")
+    return value.strip()
+
+
+async def parse_rows(
+    lines: AsyncIterable[str], import_format: str, tz_name: str = DEFAULT_TIMEZONE
+) -> AsyncIterator[Tuple[str, datetime, date]]:
+    """
+    Yields (course_name, studied_at, study_day) from NDJSON objects or CSV rows.
+
+    Both formats use the `course_name` and `date` fields of the export, so an
+    export can be imported again; other fields are ignored. CSV needs a header.
+    """
+    header = None
+    line_number = 0
+    async for line in lines:
+        line_number += 1
+        if not line.strip():
+            continue
+
+        if import_format == "csv":
+            values = next(csv.reader([line]))
+            if header is None:
+                header = [name.strip() for name in values]
+                if "course_name" not in header or "date" not in header:
+                    raise _invalid(line_number, "the CSV header must name 'course_name' and 'date' columns.")
+                continue
+            record = dict(zip(header, values))
+        else:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                raise _invalid(line_number, "not a JSON object.")
+            if not isinstance(record, dict):
+                raise _invalid(line_number, "not a JSON object.")
+
+        yield (
+            _parse_course_name(record.get("course_name"), line_number),
+            *_parse_studied_at(record.get("date"), line_number, tz_name),
+        )
+
+
+@instrument_service
+class ImportService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+        self._course_ids: Dict[str, uuid.UUID] = {}
+        self._created_courses: List[str] = []
+
+    async def import_study_sessions(
+        self, user_id: str, lines: AsyncIterable[str], import_format: str, tz_name: str = DEFAULT_TIMEZONE
+    ) -> Dict:
+        """
+        Imports historical study sessions for a user in one transaction.
+
+        The whole body is read and validated first, into a temporary file, so a
+        slow upload or an invalid row never holds a connection or the user's lock.
+        The rows are then loaded in batches of IMPORT_BATCH_SIZE, creating any
+        courses the user does not have yet. Sessions on a day that already has
+        one for the course are skipped, so re-running an import is harmless. The
+        course totals, study_days rollup and streak are then recomputed once for
+        the user instead of per row. Days are counted in the user's timezone (tz_name).
+        """
+        # Hand the connection back to the pool while the body is read
+        await self.db.close()
+
+        with tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_MEMORY_BYTES, mode="w+", encoding="utf-8") as spool:
+            total_rows = await self._spool_rows(lines, import_format, tz_name, spool)
+            spool.seek(0)
+
+            # Serialise with course creation so a course cannot be created twice.
+            await self.db.execute(select(func.pg_advisory_xact_lock(func.hashtext(str(user_id)))))
+
+            imported = 0
+            batch = []
+            for line in spool:
+                course_name, studied_at, study_day = json.loads(line)
+                batch.append((course_name, datetime.fromisoformat(studied_at), date.fromisoformat(study_day)))
+                if len(batch) >= IMPORT_BATCH_SIZE:
+                    imported += await self._load_batch(user_id, batch)
+                    batch = []
+            if batch:
+                imported += await self._load_batch(user_id, batch)
+
+        if imported:
+            await self._recompute_course_totals(user_id)
+            rollups = RollupService(self.db)
+            await rollups.rebuild_study_days(user_id, commit=False)
+            await rollups.rebuild_streaks(user_id, commit=False)
+            await self.db.execute(bump_data_version(user_id))
+        await self.db.commit()
+        if imported:
+            await result_cache.invalidate_user(user_id)
+
+        return {
+            "message": "Study sessions imported successfully.",
+            "rows": total_rows,
+            "imported": imported,
+            "skipped_duplicates": total_rows - imported,
+            "created_courses": self._created_courses,
+        }
+
+    @staticmethod
+    async def _spool_rows(lines: AsyncIterable[str], import_format: str, tz_name: str, spool: IO[str]) -> int:
+        """Writes every parsed row to spool as a JSON array per line and returns how many there were."""
+        total_rows = 0
+        async for course_name, studied_at, study_day in parse_rows(lines, import_format, tz_name):
+            total_rows += 1
+            if total_rows > IMPORT_MAX_ROWS:
+                raise HTTPException(
+                    status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                    detail=f"An import can contain at most {IMPORT_MAX_ROWS} rows."
+                )
+            spool.write(json.dumps([course_name, studied_at.isoformat(), study_day.isoformat()]) + "\n")
+        return total_rows
+
+    async def _load_batch(self, user_id: str, batch: List[Tuple[str, datetime, date]]) -> int:
+        """Inserts one batch of sessions and returns how many were new."""
+        await self._resolve_courses(user_id, {name for name, _, _ in batch})
+        inserted = await self.db.scalars(
+            insert(StudySession).on_conflict_do_nothing().returning(StudySession.id),
+            [
+                {"user_id": user_id, "course_id": self._course_ids[name], "date": studied_at, "study_day": study_day}
+                for name, studied_at, study_day in batch
+            ],
+        )
+        return len(inserted.all())
+
+    async def _resolve_courses(self, user_id: str, names):
+        """Looks up the user's courses by name, creating the missing ones."""
+        unknown = sorted(names - self._course_ids.keys())
+        if not unknown:
+            return
+
+        self._course_ids.update(
+            (
+                await self.db.execute(
+                    select(Course.name, Course.id)
+                    .join(UserCourse, UserCourse.course_id == Course.id)
+                    .where(UserCourse.user_id == user_id, Course.name.in_(unknown))
+                )
+            ).all()
+        )
+
+        missing = [name for name in unknown if name not in self._course_ids]
+        if not missing:
+            return
+
+        created = (
+            await self.db.execute(
+                insert(Course).returning(Course.name, Course.id, sort_by_parameter_order=True),
+                [{"id": uuid.uuid4(), "name": name} for name in missing],
+            )
+        ).all()
+        await self.db.execute(
+            insert(UserCourse),
+            [{"user_id": user_id, "course_id": course_id} for _, course_id in created],
+        )
+        self._course_ids.update(created)
+        self._created_courses.extend(missing)
+
+    async def _recompute_course_totals(self, user_id: str):
+        """Sets every course's total_study_days and last_studied_at from its sessions."""
+        totals = (
+            select(
+                StudySession.course_id,
+                func.count().label("days"),
+                func.max(StudySession.date).label("last_studied_at"),
+            )
+            .where(StudySession.user_id == user_id)
+            .group_by(StudySession.course_id)
+            .subquery()
+        )
+        await self.db.execute(
+            update(UserCourse)
+            .where(UserCourse.user_id == user_id, UserCourse.course_id == totals.c.course_id)
+            .values(total_study_days=totals.c.days, last_studied_at=totals.c.last_studied_at)
+            .execution_options(synchronize_session=False)
+        )
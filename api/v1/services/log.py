@@ -1,72 +1,201 @@
-from sqlalchemy.orm import Session
-from typing import Dict
-from datetime import date, datetime
-from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, List, NamedTuple
+from collections import Counter
+from datetime import date, datetime, timezone
+import uuid
+from sqlalchemy import DateTime, Integer, bindparam, case, func, select, update
+from sqlalchemy.dialects.postgresql import insert
 from fastapi import HTTPException, status
 
+from api.core.cache import result_cache
+from api.core.conditional import bump_data_version
+from api.core.dates import DEFAULT_TIMEZONE, local_day
+from api.core.instrumentation import instrument_service
+
 from ..schemas.course import LogCoursesRequest
 from ..models.user_course import UserCourse
 from ..models.study_session import StudySession
 from ..models.course import Course
+from ..models.study_day import StudyDay
+from ..models.user_streak import UserStreak
 
 
-class LogService:
-    def __init__(self, db: Session):
-        self.db = db
+class LogEntry(NamedTuple):
+    """One validated log request: the requested course names mapped to ids, and the day it counts for."""
+    user_id: uuid.UUID
+    course_ids: Dict[str, uuid.UUID]
+    study_day: date
+    studied_at: datetime
 
-    def log_study_sessions(self, user_id: str, log_request: LogCoursesRequest) -> Dict:
-        """Logs study sessions for multiple courses for a given user."""
-        today = date.today()
-        logged_courses_info =[]
 
-        for course_name in log_request.course_names:
-            course_name = course_name.strip()
+@instrument_service
+class LogService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
 
-            course = (
-                self.db.query(Course)
-                .filter(Course.name == course_name)
-                .first()
-            )
+    async def resolve_course_ids(self, user_id: str, course_names: List[str]) -> Dict[str, uuid.UUID]:
+        """Maps course names, in order, to the user's course ids in one query; 404 for a name the user does not have."""
+        course_ids = dict(
+            (
+                await self.db.execute(
+                    select(Course.name, Course.id)
+                    .join(UserCourse, UserCourse.course_id == Course.id)
+                    .where(UserCourse.user_id == user_id, Course.name.in_(course_names))
+                )
+            ).all()
+        )
 
-            if not course:
+        for course_name in course_names:
+            if course_name not in course_ids:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail=f"Course '{course_name}' not found."
                 )
+        return {name: course_ids[name] for name in course_names}
+
+    async def log_study_sessions(self, user_id: str, log_request: LogCoursesRequest, tz_name: str = DEFAULT_TIMEZONE) -> Dict:
+        """
+        Logs study sessions for multiple courses for a given user.
+
+        Sessions are counted on the current day in the user's timezone (tz_name).
+
+        The number of statements is constant regardless of how many courses are logged:
+        one lookup, one multi-row insert and one counter update, plus the rollup writes.
+        """
+        [logged_courses] = await self.log_study_sessions_batch([
+            await self._log_entry(user_id, log_request, tz_name)
+        ])
+        return {"message": "Study sessions logged successfully.", "logged_courses": logged_courses}
 
-            user_course = self.db.query(UserCourse).filter_by(user_id=user_id, course_id=course.id).first()
-
-            if not user_course:
-                print(f"Warning: UserCourse link not found for user {user_id} and course {course_name}. Creating it.")
-                user_course = UserCourse(user_id=user_id, course_id=course.id)
-                self.db.add(user_course)
-                self.db.flush()
-
-            existing_session_today = (
-                self.db.query(StudySession)
-                .filter(
-                    StudySession.user_id ==  user_id,
-                    StudySession.course_id == course.id,
-                    func.date(StudySession.date) == today
-                ).first()
+    async def prepare_log_entry(self, user_id: str, log_request: LogCoursesRequest, tz_name: str = DEFAULT_TIMEZONE) -> LogEntry:
+        """
+        Validates a log request for the write-behind queue without writing anything.
+
+        The day is fixed now, not when the queue is flushed. Ends the read
+        transaction so the connection is not held while the entry waits.
+        """
+        entry = await self._log_entry(user_id, log_request, tz_name)
+        await self.db.rollback()
+        return entry
+
+    async def _log_entry(self, user_id: str, log_request: LogCoursesRequest, tz_name: str) -> LogEntry:
+        now = datetime.now(timezone.utc)
+        course_names = list(dict.fromkeys(name.strip() for name in log_request.course_names))
+        course_ids = await self.resolve_course_ids(user_id, course_names)
+        return LogEntry(user_id, course_ids, local_day(now, tz_name), now)
+
+    async def log_study_sessions_batch(self, entries: List[LogEntry]) -> List[List[str]]:
+        """
+        Logs already validated study sessions of any number of users in one transaction.
+
+        Returns, for each entry, the names of the courses it logged for the first
+        time that day; when two entries log the same course on the same day, the
+        earlier one gets it. The number of statements does not depend on the
+        number of entries or users, except for the streak upsert, which runs once
+        more for every extra day a single user logs in the batch.
+        """
+        sessions = {}  # (user_id, course_id, study_day) -> studied_at of the first entry logging it
+        last_studied = {}  # (user_id, course_id) -> latest studied_at
+        for entry in entries:
+            for course_id in entry.course_ids.values():
+                sessions.setdefault((entry.user_id, course_id, entry.study_day), entry.studied_at)
+                pair = (entry.user_id, course_id)
+                last_studied[pair] = max(last_studied.get(pair, entry.studied_at), entry.studied_at)
+
+        # The unique (user, course, day) index decides which courses are logged
+        # for the first time that day, so concurrent requests cannot both count them.
+        # Rows go in as parameter lists, not inline VALUES, so each statement is
+        # compiled once and cached whatever the batch size.
+        logged = set()
+        if sessions:
+            logged = set(
+                (
+                    await self.db.execute(
+                        insert(StudySession)
+                        .on_conflict_do_nothing()
+                        .returning(StudySession.user_id, StudySession.course_id, StudySession.study_day),
+                        [
+                            {"user_id": user_id, "course_id": course_id, "date": studied_at, "study_day": study_day}
+                            for (user_id, course_id, study_day), studied_at in sessions.items()
+                        ],
+                    )
+                ).all()
             )
 
-            if not existing_session_today:
-                # Only create a new session if one doesn't exist for today
-                new_session = StudySession(
-                    user_id=user_id,
-                    course_id=course.id,
-                    date=datetime.now(),
-                )
-                self.db.add(new_session)
+        new_days = Counter((user_id, course_id) for user_id, course_id, _ in logged)
+        user_courses = UserCourse.__table__
+        await self.db.execute(
+            update(user_courses)
+            .where(user_courses.c.user_id == bindparam("b_user_id"), user_courses.c.course_id == bindparam("b_course_id"))
+            .values(
+                total_study_days=func.coalesce(user_courses.c.total_study_days, 0) + bindparam("new_days", type_=Integer),
+                last_studied_at=func.greatest(user_courses.c.last_studied_at, bindparam("studied_at", type_=DateTime(timezone=True))),
+            ),
+            [
+                {"b_user_id": user_id, "b_course_id": course_id, "new_days": new_days[user_id, course_id], "studied_at": studied_at}
+                for (user_id, course_id), studied_at in last_studied.items()
+            ],
+        )
+
+        if logged:
+            await self.db.execute(
+                insert(StudyDay).on_conflict_do_nothing(),
+                [{"user_id": user_id, "course_id": course_id, "day": study_day} for user_id, course_id, study_day in logged],
+            )
+            await self._update_streaks({(user_id, study_day) for user_id, _, study_day in logged})
+
+        user_ids = list(dict.fromkeys(entry.user_id for entry in entries))
+        await self.db.execute(bump_data_version(*user_ids))
+        await self.db.commit()
+        for user_id in user_ids:
+            await result_cache.invalidate_user(user_id)
+
+        results = []
+        for entry in entries:
+            logged_courses = []
+            for name, course_id in entry.course_ids.items():
+                key = (entry.user_id, course_id, entry.study_day)
+                if key in logged:
+                    logged.discard(key)
+                    logged_courses.append(name)
+            results.append(logged_courses)
+        return results
 
-                # Only increment total_study_days for the first log of the day
-                user_course.total_study_days = (user_course.total_study_days or 0) + 1
+    async def _update_streaks(self, study_days):
+        """
+        Advances streak state to include each (user_id, study_day) pair.
 
-                logged_courses_info.append(str(course_name))
-                
-            user_course.last_studied_at = datetime.now()
+        A user's days must be applied in order and an upsert can touch each row
+        only once, so every round takes the next day of each user.
+        """
+        days_by_user = {}
+        for user_id, study_day in sorted(study_days):
+            days_by_user.setdefault(user_id, []).append(study_day)
+        rounds = max(len(days) for days in days_by_user.values())
+        for i in range(rounds):
+            await self._update_streak([(user_id, days[i]) for user_id, days in days_by_user.items() if i < len(days)])
 
-        self.db.commit()
-        
-        return {"message": "Study sessions logged successfully.", "logged_courses": logged_courses_info}
\ No newline at end of file
+    async def _update_streak(self, study_days):
+        """Advances the streak state of several users, one new day each, in a single upsert."""
+        stmt = insert(UserStreak)
+        new_day = stmt.excluded.last_study_day
+        current_streak = case(
+            (UserStreak.last_study_day >= new_day, UserStreak.current_streak),
+            (UserStreak.last_study_day == new_day - 1, UserStreak.current_streak + 1),
+            else_=1,
+        )
+        await self.db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[UserStreak.user_id],
+                set_={
+                    "current_streak": current_streak,
+                    "longest_streak": func.greatest(UserStreak.longest_streak, current_streak),
+                    "last_study_day": func.greatest(UserStreak.last_study_day, new_day),
+                    "updated_at": func.now(),
+                },
+            ),
+            [
+                {"user_id": user_id, "current_streak": 1, "longest_streak": 1, "last_study_day": study_day}
+                for user_id, study_day in study_days
+            ],
+        )
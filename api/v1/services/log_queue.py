@@ -0,0 +1,199 @@
+# api/v1/services/log_queue.py
+import asyncio
+import logging
+import os
+import time
+from typing import List, Optional
+
+from fastapi import HTTPException, status
+
+from api.core.metrics import Counter, Gauge, Histogram
+from api.db.database import AsyncSessionLocal
+
+from .log import LogEntry, LogService
+
+logger = logging.getLogger(__name__)
+
+LOG_INGEST_MODES = ("direct", "queued")
+LOG_INGEST_ACKS = ("flush", "accept")
+
+log_ingest_batch_size = Histogram(
+    "log_ingest_batch_entries", "Log requests written per queued flush.", (1, 5, 10, 25, 50, 100, 250, 500, 1000)
+)
+log_ingest_flush_time = Histogram("log_ingest_flush_seconds", "Time taken by one queued flush transaction.")
+log_ingest_rejected = Counter("log_ingest_rejected_total", "Log requests turned away because the queue was full.")
+log_ingest_failed = Counter("log_ingest_failed_total", "Queued log requests that could not be written.")
+
+
+class _Queued:
+    __slots__ = ("entry", "future")
+
+    def __init__(self, entry: LogEntry, future: Optional[asyncio.Future]):
+        self.entry = entry
+        self.future = future
+
+
+class LogIngestQueue:
+    """
+    Write-behind queue that batches POST /logs requests across users.
+
+    Requests are validated by the route, then queued; a background task writes
+    whatever is queued in one LogService.log_study_sessions_batch transaction as
+    soon as `batch_size` requests are waiting or `flush_interval` seconds after
+    the first one arrived. With ack="flush" a request waits for the transaction
+    that contains it and gets the usual response; with ack="accept" it returns
+    as soon as it is queued, so a following read may not see it yet. A full
+    queue answers 503, and stop() writes out everything still queued.
+    """
+
+    def __init__(self, session_factory, enabled: bool = False, ack: str = "flush", batch_size: int = 500,
+                 flush_interval: float = 0.05, max_size: int = 10000):
+        if ack not in LOG_INGEST_ACKS:
+            raise ValueError(f"Unknown log ingest acknowledgement policy '{ack}'.")
+        self.session_factory = session_factory
+        self.enabled = enabled
+        self.ack = ack
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: asyncio.Queue = asyncio.Queue(max_size)
+        self._full = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        self.flushes = 0
+
+    @classmethod
+    def from_env(cls, session_factory) -> "LogIngestQueue":
+        mode = os.getenv("LOG_INGEST_MODE", "direct").lower()
+        if mode not in LOG_INGEST_MODES:
+            raise ValueError(f"LOG_INGEST_MODE must be one of {', '.join(LOG_INGEST_MODES)}.")
+        return cls(
+            session_factory,
+            enabled=mode == "queued",
+            ack=os.getenv("LOG_INGEST_ACK", "flush").lower(),
+            batch_size=int(os.getenv("LOG_INGEST_BATCH_SIZE", "500")),
+            flush_interval=float(os.getenv("LOG_INGEST_FLUSH_MS", "50")) / 1000,
+            max_size=int(os.getenv("LOG_INGEST_MAX_QUEUE", "10000")),
+        )
+
+    def start(self):
+        """Starts the flushing task; submit() also starts it on first use."""
+        if self._task is None:
+            self._closing = False
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Stops taking requests and writes out everything already queued."""
+        if self._task is None:
+            return
+        self._closing = True
+        self._full.set()
+        await self._queue.join()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def submit(self, entry: LogEntry) -> Optional[List[str]]:
+        """
+        Queues a validated log request.
+
+        Returns the names of the courses it logged for the first time today once
+        its batch has been committed, or None right away when ack is "accept".
+        """
+        if self._closing:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="The server is shutting down, please retry shortly.",
+                headers={"Retry-After": "1"},
+            )
+        self.start()
+        future = asyncio.get_running_loop().create_future() if self.ack == "flush" else None
+        try:
+            self._queue.put_nowait(_Queued(entry, future))
+        except asyncio.QueueFull:
+            log_ingest_rejected.inc()
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many study logs are waiting to be saved, please retry shortly.",
+                headers={"Retry-After": "1"},
+            )
+        if self._queue.qsize() >= self.batch_size:
+            self._full.set()
+        if future is None:
+            return None
+        # If the client goes away its entry is still written; only the wait is abandoned.
+        return await asyncio.shield(future)
+
+    async def _run(self):
+        while True:
+            batch = [await self._queue.get()]
+            if not self._closing and self._queue.qsize() + 1 < self.batch_size:
+                self._full.clear()
+                try:
+                    await asyncio.wait_for(self._full.wait(), self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                await self._flush(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _flush(self, batch: List[_Queued]):
+        start = time.perf_counter()
+        try:
+            results = await self._write([queued.entry for queued in batch])
+        except Exception:
+            # One bad entry (say, a course deleted while it was queued) must not
+            # fail the others: retry them one transaction each.
+            logger.exception("Batched log flush of %d entries failed; retrying them one by one", len(batch))
+            for queued in batch:
+                try:
+                    [result] = await self._write([queued.entry])
+                except Exception as e:
+                    log_ingest_failed.inc()
+                    logger.exception("Could not write queued study log of user %s", queued.entry.user_id)
+                    self._resolve(queued, error=e)
+                else:
+                    self._resolve(queued, result)
+        else:
+            for queued, result in zip(batch, results):
+                self._resolve(queued, result)
+        self.flushes += 1
+        log_ingest_batch_size.observe(len(batch))
+        log_ingest_flush_time.observe(time.perf_counter() - start)
+
+    async def _write(self, entries: List[LogEntry]) -> List[List[str]]:
+        async with self.session_factory() as db:
+            return await LogService(db).log_study_sessions_batch(entries)
+
+    @staticmethod
+    def _resolve(queued: _Queued, result=None, error: Optional[BaseException] = None):
+        if queued.future is None or queued.future.done():
+            return
+        if error is not None:
+            queued.future.set_exception(error)
+        else:
+            queued.future.set_result(result)
+
+    @property
+    def queued(self) -> int:
+        return self._queue.qsize()
+
+    def stats(self) -> dict:
+        return {
+            "mode": "queued" if self.enabled else "direct",
+            "ack": self.ack,
+            "queued": self.queued,
+            "flushes": self.flushes,
+            "rejected": int(log_ingest_rejected.value),
+            "failed": int(log_ingest_failed.value),
+        }
+
+
+log_queue = LogIngestQueue.from_env(AsyncSessionLocal)
+Gauge("log_ingest_queue_depth", "Log requests waiting to be written.", function=lambda: log_queue.queued)
@@ -0,0 +1,148 @@
+# api/v1/services/refresh_token.py
+import logging
+import secrets
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from api.core.instrumentation import instrument_service
+from api.core.metrics import Counter
+from api.core.security import REFRESH_TOKEN_EXPIRE_DAYS, hash_token
+from ..models.refresh_token import RefreshToken
+from ..models.user import User
+
+logger = logging.getLogger(__name__)
+
+refresh_outcomes = Counter("auth_refresh_total", "Refresh token exchanges by outcome.", ("outcome",))
+
+
+@instrument_service
+class RefreshTokenService:
+    """
+    Rotating refresh tokens.
+
+    Each sign-in starts a family; every refresh revokes the presented token and
+    issues the next one of the same family. Presenting a token that was already
+    rotated means it was copied, so the whole family is revoked and that device
+    has to sign in again. Only SHA-256 digests are stored: tokens are random, so
+    no slow hash is needed and a refresh never touches bcrypt.
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def issue(self, user_id, device: Optional[str] = None, expires_in: Optional[timedelta] = None) -> str:
+        """
+        Starts a new family for a sign-in and returns its first refresh token.
+
+        expires_in shortens that first token's lifetime, e.g. for a sign-in code;
+        the tokens it rotates into get the full REFRESH_TOKEN_EXPIRE_DAYS.
+        """
+        now = datetime.now(timezone.utc)
+        # Sign-ins are rare enough to tidy up the user's expired tokens here
+        await self.db.execute(
+            delete(RefreshToken).where(RefreshToken.user_id == user_id, RefreshToken.expires_at < now)
+        )
+        expires_at = now + (expires_in or timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS))
+        token = await self._insert(user_id, uuid.uuid4(), device, expires_at)
+        await self.db.commit()
+        return token
+
+    async def rotate(self, token: str) -> Tuple[Row, str]:
+        """
+        Exchanges a refresh token for the next one of its family.
+
+        Returns the user's id and email, for the new access token, and the new
+        refresh token. Raises 401 for unknown, expired, revoked or reused tokens.
+        """
+        now = datetime.now(timezone.utc)
+        token_hash = hash_token(token)
+        # Revoke the presented token only if it is still live, so two concurrent
+        # refreshes with the same token cannot both succeed.
+        rotated = (
+            await self.db.execute(
+                update(RefreshToken)
+                .where(
+                    RefreshToken.token_hash == token_hash,
+                    RefreshToken.revoked_at.is_(None),
+                    RefreshToken.expires_at > now,
+                    User.id == RefreshToken.user_id,
+                    User.is_active.isnot(False),
+                )
+                .values(revoked_at=now)
+                .returning(User.id, User.email, RefreshToken.family_id, RefreshToken.device)
+                .execution_options(synchronize_session=False)
+            )
+        ).first()
+
+        if rotated is None:
+            await self._revoke_if_reused(token_hash)
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid or expired refresh token",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+
+        new_token = await self._insert(
+            rotated.id, rotated.family_id, rotated.device, now + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+        )
+        await self.db.commit()
+        refresh_outcomes.labels("rotated").inc()
+        return rotated, new_token
+
+    async def revoke(self, token: str, user_id) -> bool:
+        """Revokes the family of one of the user's refresh tokens, signing that device out."""
+        family_id = await self.db.scalar(
+            select(RefreshToken.family_id)
+            .where(RefreshToken.token_hash == hash_token(token), RefreshToken.user_id == user_id)
+        )
+        if family_id is None:
+            return False
+        await self._revoke_family(family_id)
+        await self.db.commit()
+        return True
+
+    async def _insert(self, user_id, family_id, device: Optional[str], expires_at: datetime) -> str:
+        token = secrets.token_urlsafe(32)
+        await self.db.execute(
+            insert(RefreshToken).values(
+                user_id=user_id,
+                family_id=family_id,
+                token_hash=hash_token(token),
+                device=device[:200] if device else None,
+                expires_at=expires_at,
+            )
+        )
+        return token
+
+    async def _revoke_family(self, family_id) -> int:
+        result = await self.db.execute(
+            update(RefreshToken)
+            .where(RefreshToken.family_id == family_id, RefreshToken.revoked_at.is_(None))
+            .values(revoked_at=datetime.now(timezone.utc))
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
+
+    async def _revoke_if_reused(self, token_hash: str):
+        family = (
+            await self.db.execute(
+                select(RefreshToken.family_id, RefreshToken.user_id, RefreshToken.revoked_at)
+                .where(RefreshToken.token_hash == token_hash)
+            )
+        ).first()
+        if family is None or family.revoked_at is None:
+            # Unknown or merely expired
+            refresh_outcomes.labels("invalid").inc()
+            return
+        if await self._revoke_family(family.family_id):
+            refresh_outcomes.labels("reused").inc()
+            logger.warning("Refresh token reuse for user %s; revoked its sign-in", family.user_id)
+        else:
+            refresh_outcomes.labels("invalid").inc()
+        await self.db.commit()
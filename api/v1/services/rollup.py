@@ -0,0 +1,109 @@
+# api/v1/services/rollup.py
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import Integer, cast, delete, func, insert, select
+from typing import Optional
+
+from api.core.instrumentation import instrument_service
+
+from ..models.study_session import StudySession
+from ..models.study_day import StudyDay
+from ..models.user_streak import UserStreak
+
+
+@instrument_service
+class RollupService:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def rebuild_study_days(self, user_id: Optional[str] = None, commit: bool = True) -> int:
+        """
+        Rebuilds the study_days rollup from raw study sessions.
+
+        Args:
+            user_id (Optional[str]): Restrict the rebuild to one user. Rebuilds every user when omitted.
+            commit (bool): Commit when done; pass False to run inside the caller's transaction.
+
+        Returns:
+            int: The number of rollup rows written.
+        """
+        clear = delete(StudyDay)
+        sessions = select(
+            StudySession.user_id,
+            StudySession.course_id,
+            StudySession.study_day,
+        ).distinct()
+
+        if user_id is not None:
+            clear = clear.where(StudyDay.user_id == user_id)
+            sessions = sessions.where(StudySession.user_id == user_id)
+
+        await self.db.execute(clear)
+        result = await self.db.execute(
+            insert(StudyDay).from_select(["user_id", "course_id", "day"], sessions)
+        )
+        if commit:
+            await self.db.commit()
+        return result.rowcount
+
+    async def rebuild_streaks(self, user_id: Optional[str] = None, commit: bool = True) -> int:
+        """
+        Recomputes current/longest streaks from the study_days rollup.
+
+        Consecutive days are grouped into runs by subtracting each day's rank
+        from the day itself; every day of a run maps to the same anchor date.
+
+        Args:
+            user_id (Optional[str]): Restrict the rebuild to one user. Rebuilds every user when omitted.
+            commit (bool): Commit when done; pass False to run inside the caller's transaction.
+
+        Returns:
+            int: The number of streak rows written.
+        """
+        days = select(StudyDay.user_id, StudyDay.day).distinct()
+        clear = delete(UserStreak)
+        if user_id is not None:
+            days = days.where(StudyDay.user_id == user_id)
+            clear = clear.where(UserStreak.user_id == user_id)
+        days = days.subquery()
+
+        rank = func.row_number().over(partition_by=days.c.user_id, order_by=days.c.day)
+        islands = select(
+            days.c.user_id,
+            days.c.day,
+            (days.c.day - cast(rank, Integer)).label("anchor"),
+        ).subquery()
+
+        runs = (
+            select(
+                islands.c.user_id,
+                func.count().label("length"),
+                func.max(islands.c.day).label("end_day"),
+            )
+            .group_by(islands.c.user_id, islands.c.anchor)
+            .subquery()
+        )
+
+        ranked_runs = select(
+            runs.c.user_id,
+            runs.c.length,
+            runs.c.end_day,
+            func.max(runs.c.length).over(partition_by=runs.c.user_id).label("longest"),
+            func.row_number().over(partition_by=runs.c.user_id, order_by=runs.c.end_day.desc()).label("recency"),
+        ).subquery()
+
+        latest_runs = select(
+            ranked_runs.c.user_id,
+            ranked_runs.c.length,
+            ranked_runs.c.longest,
+            ranked_runs.c.end_day,
+        ).where(ranked_runs.c.recency == 1)
+
+        await self.db.execute(clear)
+        result = await self.db.execute(
+            insert(UserStreak).from_select(
+                ["user_id", "current_streak", "longest_streak", "last_study_day"], latest_runs
+            )
+        )
+        if commit:
+            await self.db.commit()
+        return result.rowcount
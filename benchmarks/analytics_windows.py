@@ -0,0 +1,96 @@
+# benchmarks/analytics_windows.py
+"""One multi-window analytics scan versus one query per range.
+
+    python -m benchmarks.analytics_windows [--courses 20] [--iterations 50]
+
+Seeds a user with a full year of study days and compares the 7d/30d/90d
+calls the frontend used to make against a single overview request. The
+result cache is bypassed so each iteration hits the database.
+"""
+import argparse
+import asyncio
+import inspect
+import random
+import time
+from datetime import timedelta
+
+from sqlalchemy import insert
+
+from api.db.database import AsyncSessionLocal, init_engines
+from api.v1.models import Course, StudyDay, User, UserCourse
+from api.v1.services.analytics import AnalyticsService, MAX_RANGE_DAYS
+
+from .common import count_statements, latency_summary, report, unique_email, utc_today
+
+RANGES = (7, 30, 90)
+
+
+async def seed(db, course_count):
+    user = User(email=unique_email("analytics"), username="bench")
+    courses = [Course(name=f"Course {i}") for i in range(course_count)]
+    db.add(user)
+    db.add_all(courses)
+    await db.flush()
+    await db.execute(insert(UserCourse), [{"user_id": user.id, "course_id": c.id} for c in courses])
+
+    today = utc_today()
+    rows = [
+        {"user_id": user.id, "course_id": course.id, "day": today - timedelta(days=offset)}
+        for offset in range(MAX_RANGE_DAYS)
+        for course in courses
+        if random.random() < 0.5
+    ]
+    await db.execute(insert(StudyDay), rows)
+    await db.commit()
+    return user.id, len(rows)
+
+
+async def main(course_count, iterations):
+    init_engines()
+    async with AsyncSessionLocal() as db:
+        user_id, rows = await seed(db, course_count)
+        service = AnalyticsService(db)
+        today = utc_today()
+        # Call the undecorated methods so the result cache does not answer.
+        per_range = inspect.unwrap(AnalyticsService.get_course_study_days)
+        overview = inspect.unwrap(AnalyticsService.get_study_overview)
+
+        per_range_samples, overview_samples, series_samples = [], [], []
+        with count_statements() as per_range_statements:
+            for _ in range(iterations):
+                start = time.perf_counter()
+                for range_in_days in RANGES:
+                    await per_range(service, user_id, range_in_days, today)
+                per_range_samples.append(time.perf_counter() - start)
+
+        with count_statements() as overview_statements:
+            for _ in range(iterations):
+                start = time.perf_counter()
+                await overview(service, user_id, RANGES, today)
+                overview_samples.append(time.perf_counter() - start)
+
+        for _ in range(iterations):
+            start = time.perf_counter()
+            await overview(service, user_id, (7, 30, 90, 365), today, True)
+            series_samples.append(time.perf_counter() - start)
+
+    report("analytics_windows", {
+        "study_day_rows": rows,
+        "per_range_queries": {
+            "statements_per_request": per_range_statements["statements"] / iterations,
+            **latency_summary(per_range_samples),
+        },
+        "single_scan_overview": {
+            "statements_per_request": overview_statements["statements"] / iterations,
+            **latency_summary(overview_samples),
+        },
+        "overview_with_year_series": latency_summary(series_samples),
+    })
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--courses", type=int, default=20)
+    parser.add_argument("--iterations", type=int, default=50)
+    args = parser.parse_args()
+    asyncio.run(main(args.courses, args.iterations))
@@ -0,0 +1,87 @@
+# benchmarks/common.py
+"""Shared helpers for the benchmark scripts.
+
+The benchmarks run against the database configured by DATABASE_URL and create
+their own throwaway users, so point them at a scratch database.
+"""
+import json
+import sys
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import httpx
+
+from sqlalchemy import event
+
+from api.db.database import get_async_engine
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a list of numbers."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def latency_summary(samples):
+    """p50/p95/p99/max of latencies given in seconds, reported in milliseconds."""
+    return {
+        "requests": len(samples),
+        "p50_ms": round(percentile(samples, 50) * 1000, 2),
+        "p95_ms": round(percentile(samples, 95) * 1000, 2),
+        "p99_ms": round(percentile(samples, 99) * 1000, 2),
+        "max_ms": round(max(samples, default=0) * 1000, 2),
+    }
+
+
+@contextmanager
+def count_statements(engine=None):
+    """Counts SQL statements sent to the database inside the block."""
+    engine = engine or get_async_engine()
+    counter = {"statements": 0}
+
+    def _count(conn, cursor, statement, parameters, context, executemany):
+        counter["statements"] += 1
+
+    event.listen(engine.sync_engine, "before_cursor_execute", _count)
+    try:
+        yield counter
+    finally:
+        event.remove(engine.sync_engine, "before_cursor_execute", _count)
+
+
+def unique_email(prefix="bench"):
+    return f"{prefix}-{uuid.uuid4().hex[:12]}@example.com"
+
+
+def utc_today():
+    """The current calendar day in UTC, the local day of the benchmark users."""
+    return datetime.now(timezone.utc).date()
+
+
+def asgi_client(app):
+    """An httpx client that calls the app in-process, without a network hop."""
+    # ASGITransport does not run the lifespan, so create the engines here.
+    get_async_engine()
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench")
+
+
+async def register(client, email, password="bench-password"):
+    """Registers a user through the API and returns bearer auth headers for it."""
+    response = await client.post("/auth/register", json={"email": email, "username": "bench", "password": password})
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def report(name, results, output=None):
+    """Prints results as one JSON document so runs can be diffed and compared; also writes it to `output` if given."""
+    document = {"benchmark": name, "results": results}
+    json.dump(document, sys.stdout, indent=2, default=str)
+    sys.stdout.write("\n")
+    if output:
+        with open(output, "w") as f:
+            json.dump(document, f, indent=2, default=str)
+            f.write("\n")
@@ -0,0 +1,51 @@
+# benchmarks/compare.py
+"""Compares two benchmarks.load result files, scenario by scenario.
+
+    python -m benchmarks.compare baseline.json candidate.json
+
+Prints, as JSON, each metric of both runs and the candidate's change relative
+to the baseline in percent (negative latency changes are improvements).
+"""
+import argparse
+import json
+
+from .common import report
+
+METRICS = ("p50_ms", "p95_ms", "p99_ms", "throughput_rps", "statements_per_request")
+
+
+def load(path):
+    with open(path) as f:
+        document = json.load(f)
+    if document.get("benchmark") != "load":
+        raise SystemExit(f"{path} is not a benchmarks.load result.")
+    return document["results"]["scenarios"]
+
+
+def change(before, after):
+    if not before:
+        return None
+    return round((after - before) / before * 100, 1)
+
+
+def compare(baseline, candidate):
+    results = {}
+    for name in baseline.keys() & candidate.keys():
+        results[name] = {
+            metric: {
+                "baseline": baseline[name][metric],
+                "candidate": candidate[name][metric],
+                "change_pct": change(baseline[name][metric], candidate[name][metric]),
+            }
+            for metric in METRICS
+        }
+    return dict(sorted(results.items()))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--output", help="Also write the comparison to this JSON file.")
+    args = parser.parse_args()
+    report("compare", compare(load(args.baseline), load(args.candidate)), args.output)
@@ -0,0 +1,148 @@
+# benchmarks/datagen.py
+"""Loads a synthetic data set for the load benchmarks into the configured database.
+
+    python -m benchmarks.datagen [--users 100] [--courses 20] [--years 2] [--density 0.4] [--seed 0.42] [--reset]
+
+Every generated user has the email datagen-<n>@example.com and the password
+DATAGEN_PASSWORD. Each user gets `--courses` courses and, for every course, a
+session on roughly `density` of the days over the last `--years` years, in a
+timezone picked from TIMEZONES. The rows are generated inside Postgres, then
+the course totals and the study_days/user_streaks rollups are rebuilt. Run
+with --reset to delete a previously generated set first; benchmarks.load
+picks its users from whatever set is loaded.
+"""
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import text
+
+from api.core.security import get_password_hash
+from api.db.database import AsyncSessionLocal, dispose_engines, get_async_engine, init_engines
+from api.v1.services.rollup import RollupService
+
+from .common import report
+
+EMAIL_PATTERN = "datagen-%@example.com"
+DATAGEN_PASSWORD = "datagen-password"
+TIMEZONES = ("UTC", "Europe/London", "Europe/Berlin", "America/New_York", "America/Los_Angeles", "Asia/Tokyo", "Australia/Sydney")
+
+
+async def reset(db):
+    deleted = await db.execute(text("DELETE FROM users WHERE email LIKE :pattern"), {"pattern": EMAIL_PATTERN})
+    await db.execute(text("""
+        DELETE FROM courses AS c
+        WHERE NOT EXISTS (SELECT 1 FROM user_courses AS uc WHERE uc.course_id = c.id)
+    """))
+    await db.commit()
+    return deleted.rowcount
+
+
+async def generate(db, users, courses, days, density, seed):
+    """Inserts the users, their courses and sessions set-based, and returns the new user ids and session count."""
+    # One bcrypt hash for everyone; hashing per user would dominate the load time.
+    hashed_password = get_password_hash(DATAGEN_PASSWORD)
+    await db.execute(text("SELECT setseed(:seed)"), {"seed": seed})
+
+    first = await db.scalar(text("""
+        SELECT COALESCE(MAX(CAST(substring(email FROM 'datagen-([0-9]+)@') AS INTEGER)), 0) + 1
+        FROM users WHERE email LIKE :pattern
+    """), {"pattern": EMAIL_PATTERN})
+
+    user_ids = list(await db.scalars(text("""
+        INSERT INTO users (id, email, username, hashed_password, auth_provider, is_active, is_verified, timezone)
+        SELECT gen_random_uuid(), 'datagen-' || n || '@example.com', 'datagen ' || n, :hashed_password,
+               'email', true, true, (CAST(:timezones AS TEXT[]))[1 + CAST(floor(random() * :zones) AS INTEGER)]
+        FROM generate_series(CAST(:first AS INTEGER), CAST(:first AS INTEGER) + CAST(:users AS INTEGER) - 1) AS n
+        RETURNING id
+    """), {
+        "hashed_password": hashed_password, "timezones": list(TIMEZONES), "zones": len(TIMEZONES),
+        "first": first, "users": users,
+    }))
+    params = {"user_ids": user_ids}
+
+    await db.execute(text("""
+        WITH new_courses AS MATERIALIZED (
+            SELECT gen_random_uuid() AS course_id, u.id AS user_id, c
+            FROM unnest(CAST(:user_ids AS UUID[])) AS u(id), generate_series(1, :courses) AS c
+        ),
+        inserted AS (
+            INSERT INTO courses (id, name) SELECT course_id, 'Course ' || c FROM new_courses
+        )
+        INSERT INTO user_courses (id, user_id, course_id, total_study_days)
+        SELECT gen_random_uuid(), user_id, course_id, 0 FROM new_courses
+    """), {**params, "courses": courses})
+
+    # One session per chosen day, between 08:00 and 20:00 local time.
+    sessions = await db.execute(text("""
+        INSERT INTO study_sessions (id, user_id, course_id, date, study_day)
+        SELECT gen_random_uuid(), u.id, uc.course_id,
+               timezone(u.timezone, day + time '08:00' + random() * interval '12 hours'), day
+        FROM users AS u
+        JOIN user_courses AS uc ON uc.user_id = u.id
+        CROSS JOIN LATERAL (
+            SELECT CAST(timezone(u.timezone, now()) AS DATE) - d AS day
+            FROM generate_series(0, CAST(:days AS INTEGER) - 1) AS d
+        ) AS days
+        WHERE u.id = ANY(CAST(:user_ids AS UUID[])) AND random() < :density
+    """), {**params, "days": days, "density": density})
+
+    await db.execute(text("""
+        UPDATE user_courses AS uc
+        SET total_study_days = s.days, last_studied_at = s.last_studied_at
+        FROM (
+            SELECT course_id, count(*) AS days, max(date) AS last_studied_at
+            FROM study_sessions
+            WHERE user_id = ANY(CAST(:user_ids AS UUID[]))
+            GROUP BY course_id
+        ) AS s
+        WHERE uc.course_id = s.course_id
+    """), params)
+    await db.commit()
+    return user_ids, sessions.rowcount
+
+
+async def main(args):
+    init_engines()
+    try:
+        async with AsyncSessionLocal() as db:
+            removed = await reset(db) if args.reset else 0
+            start = time.perf_counter()
+            user_ids, sessions = await generate(db, args.users, args.courses, args.years * 365, args.density, args.seed)
+            generated = time.perf_counter() - start
+
+            start = time.perf_counter()
+            rollups = RollupService(db)
+            for user_id in user_ids:
+                await rollups.rebuild_study_days(user_id, commit=False)
+                await rollups.rebuild_streaks(user_id, commit=False)
+            await db.commit()
+            rebuilt = time.perf_counter() - start
+        async with get_async_engine().connect() as conn:
+            await conn.execution_options(isolation_level="AUTOCOMMIT")
+            await conn.execute(text("ANALYZE"))
+    finally:
+        await dispose_engines()
+
+    report("datagen", {
+        "removed_users": removed,
+        "users": args.users,
+        "courses_per_user": args.courses,
+        "days": args.years * 365,
+        "density": args.density,
+        "study_sessions": sessions,
+        "generate_seconds": round(generated, 2),
+        "rollup_seconds": round(rebuilt, 2),
+    })
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--courses", type=int, default=20)
+    parser.add_argument("--years", type=int, default=2)
+    parser.add_argument("--density", type=float, default=0.4)
+    parser.add_argument("--seed", type=float, default=0.42, help="Postgres setseed() value, between -1 and 1.")
+    parser.add_argument("--reset", action="store_true", help="Delete previously generated users first.")
+    args = parser.parse_args()
+    asyncio.run(main(args))
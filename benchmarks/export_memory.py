@@ -0,0 +1,188 @@
+# benchmarks/export_memory.py
+"""Server memory while streaming /logs/export for a small and a very large user.
+
+    python -m benchmarks.export_memory [--rows 2000000] [--small-rows 10000] [--format ndjson]
+                                       [--max-growth-mb 64] [--output run.json]
+
+Runs the app under uvicorn in a subprocess and samples its resident set size
+while the export is downloaded over HTTP, so the client's buffering does not
+count. A third download is abandoned after the first chunk to check the
+connection goes back to the pool.
+
+Exits non-zero if the large user's peak RSS is more than --max-growth-mb above
+the small user's, i.e. the export buffers rows, or if the abandoned download's
+connection is not released.
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import httpx
+from sqlalchemy import text
+
+from api.db.database import AsyncSessionLocal, dispose_engines, init_engines
+
+from .common import register, report, unique_email
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DAYS_PER_COURSE = 4000
+
+
+def rss_bytes(pid):
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) * 1024
+    return 0
+
+
+class RssSampler(threading.Thread):
+    """Records the peak RSS of a process until stopped."""
+
+    def __init__(self, pid, interval=0.02):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.peak = 0
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            self.peak = max(self.peak, rss_bytes(self.pid))
+            time.sleep(self.interval)
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        return self.peak
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def wait_until_ready(client, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get("/ready")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("server did not become ready")
+
+
+async def seed_sessions(email, rows):
+    """Inserts `rows` sessions for the user, spread over courses of DAYS_PER_COURSE days each."""
+    courses = max(1, -(-rows // DAYS_PER_COURSE))
+    async with AsyncSessionLocal() as db:
+        user_id = await db.scalar(text("SELECT id FROM users WHERE email = :email"), {"email": email})
+        await db.execute(text("""
+            WITH new_courses AS (
+                INSERT INTO courses (id, name)
+                SELECT gen_random_uuid(), 'Course ' || n FROM generate_series(1, :courses) AS n
+                RETURNING id
+            )
+            INSERT INTO user_courses (id, user_id, course_id, total_study_days)
+            SELECT gen_random_uuid(), :user_id, id, 0 FROM new_courses
+        """), {"courses": courses, "user_id": user_id})
+        await db.execute(text("""
+            INSERT INTO study_sessions (id, user_id, course_id, date, study_day)
+            SELECT gen_random_uuid(), :user_id, uc.course_id, now() - make_interval(days => d), CAST(timezone('UTC', now()) AS DATE) - d
+            FROM user_courses AS uc, generate_series(0, :days - 1) AS d
+            WHERE uc.user_id = :user_id
+            LIMIT :rows
+        """), {"user_id": user_id, "days": DAYS_PER_COURSE, "rows": rows})
+        await db.commit()
+
+
+async def download(client, headers, export_format, pid):
+    sampler = RssSampler(pid)
+    sampler.start()
+    start = time.perf_counter()
+    size = 0
+    async with client.stream("GET", "/logs/export", params={"format": export_format}, headers=headers) as response:
+        response.raise_for_status()
+        async for chunk in response.aiter_bytes():
+            size += len(chunk)
+    elapsed = time.perf_counter() - start
+    return {"bytes": size, "seconds": round(elapsed, 2), "peak_rss_mb": round(sampler.stop() / 2**20, 1)}
+
+
+async def abandon(client, headers, export_format, timeout=30):
+    async with client.stream("GET", "/logs/export", params={"format": export_format}, headers=headers) as response:
+        async for _ in response.aiter_bytes():
+            break
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        pool = (await client.get("/ready")).json()["pool"]
+        if pool["checked_out"] == 0:
+            return {"connection_released_after_seconds": round(time.perf_counter() - start, 2)}
+        await asyncio.sleep(0.1)
+    return {"connection_released_after_seconds": None}
+
+
+def failures(results, max_growth_mb):
+    problems = []
+    if results["peak_rss_growth_mb"] > max_growth_mb:
+        problems.append(
+            f"peak RSS grew {results['peak_rss_growth_mb']} MB from the small to the large export "
+            f"(limit {max_growth_mb} MB)"
+        )
+    if results["disconnect"]["connection_released_after_seconds"] is None:
+        problems.append("the abandoned export's connection was not released")
+    return problems
+
+
+async def main(rows, small_rows, export_format, max_growth_mb, output=None):
+    init_engines()
+    port = free_port()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT,
+    )
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=None) as client:
+            await wait_until_ready(client)
+            results = {"format": export_format, "baseline_rss_mb": round(rss_bytes(server.pid) / 2**20, 1)}
+            for label, count in (("small", small_rows), ("large", rows)):
+                email = unique_email("export")
+                headers = await register(client, email)
+                seeded = time.perf_counter()
+                await seed_sessions(email, count)
+                results[label] = {
+                    "rows": count,
+                    "seed_seconds": round(time.perf_counter() - seeded, 2),
+                    **await download(client, headers, export_format, server.pid),
+                }
+            results["peak_rss_growth_mb"] = round(results["large"]["peak_rss_mb"] - results["small"]["peak_rss_mb"], 1)
+            results["disconnect"] = await abandon(client, headers, export_format)
+    finally:
+        server.terminate()
+        server.wait()
+        await dispose_engines()
+    report("export_memory", results, output)
+
+    problems = failures(results, max_growth_mb)
+    if problems:
+        raise SystemExit("FAIL: " + "; ".join(problems))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--small-rows", type=int, default=10_000)
+    parser.add_argument("--format", choices=("ndjson", "csv"), default="ndjson")
+    parser.add_argument("--max-growth-mb", type=float, default=64,
+                        help="Fail if the large export's peak RSS exceeds the small one's by more than this.")
+    parser.add_argument("--output", help="Also write the results to this JSON file.")
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.small_rows, args.format, args.max_growth_mb, args.output))
@@ -0,0 +1,179 @@
+# benchmarks/load.py
+"""Latency, throughput and SQL statements per request of the main endpoints under concurrent load.
+
+    python -m benchmarks.datagen --users 200          # once, to load the data set
+    python -m benchmarks.load [--requests 500] [--concurrency 20] [--users 100] [--no-cache] [--output run.json]
+
+Drives the app in-process through the httpx ASGI transport as users created by
+benchmarks.datagen, so the numbers reflect realistic histories rather than
+empty accounts. Each scenario sends its requests from `--concurrency` workers,
+cycling through the users. Logins run bcrypt, so they get `--login-requests`
+instead; auth_refresh is the bcrypt-free way to renew an access token, for
+comparison. With --no-cache the result cache is bypassed and every read hits the
+database. Compare two --output files with benchmarks.compare.
+"""
+import argparse
+import asyncio
+import itertools
+import platform
+import random
+import time
+from collections import Counter
+from datetime import datetime, timezone
+
+from sqlalchemy import select
+
+from api.core.cache import result_cache
+from api.core.security import create_access_token, token_claims
+from api.db.database import AsyncSessionLocal, dispose_engines, init_engines
+from api.v1.models.course import Course
+from api.v1.models.user import User
+from api.v1.models.user_course import UserCourse
+from api.v1.services.refresh_token import RefreshTokenService
+from main import app
+
+from .common import asgi_client, count_statements, latency_summary, report
+from .datagen import DATAGEN_PASSWORD, EMAIL_PATTERN
+
+
+class BenchUser:
+    def __init__(self, user, course_names):
+        self.id = user.id
+        self.email = user.email
+        self.course_names = course_names
+        self.headers = {"Authorization": f"Bearer {create_access_token(token_claims(user))}"}
+        self.refresh_token = None
+
+
+def _get(path, params=None):
+    def request(client, user):
+        return client.get(path, params=params, headers=user.headers)
+    return request
+
+
+def _log(client, user):
+    courses = random.sample(user.course_names, min(2, len(user.course_names)))
+    return client.post("/logs", json={"course_names": courses}, headers=user.headers)
+
+
+def _login(client, user):
+    return client.post("/auth/login", json={"email": user.email, "password": DATAGEN_PASSWORD})
+
+
+async def _refresh(client, user):
+    response = await client.post("/auth/refresh", json={"refresh_token": user.refresh_token})
+    # Tokens are single use: keep the rotated one for this user's next turn
+    if response.status_code == 200:
+        user.refresh_token = response.json()["refresh_token"]
+    return response
+
+
+SCENARIOS = {
+    "dashboard_summary": _get("/dashboard/summary"),
+    "dashboard_checklist": _get("/dashboard/checklist"),
+    "analytics": _get("/analytics", {"range": "30d"}),
+    "logs": _log,
+    "courses": _get("/courses"),
+    "auth_login": _login,
+    "auth_refresh": _refresh,
+}
+
+
+async def load_users(limit):
+    """Picks up to `limit` generated users and their course names."""
+    async with AsyncSessionLocal() as db:
+        users = (
+            await db.scalars(select(User).where(User.email.like(EMAIL_PATTERN)).order_by(User.email).limit(limit))
+        ).all()
+        rows = await db.execute(
+            select(UserCourse.user_id, Course.name)
+            .join(Course, Course.id == UserCourse.course_id)
+            .where(UserCourse.user_id.in_([user.id for user in users]))
+        )
+    course_names = {}
+    for user_id, name in rows:
+        course_names.setdefault(user_id, []).append(name)
+    return [BenchUser(user, course_names.get(user.id, [])) for user in users]
+
+
+async def issue_refresh_tokens(users):
+    """Signs every user in once, without a password, so auth_refresh has tokens to rotate."""
+    async with AsyncSessionLocal() as db:
+        service = RefreshTokenService(db)
+        for user in users:
+            user.refresh_token = await service.issue(user.id, "benchmarks.load")
+
+
+async def run_scenario(client, send, users, requests, concurrency):
+    samples = []
+    statuses = Counter()
+    sent = itertools.count()
+    user_cycle = itertools.cycle(users)
+
+    async def worker():
+        while next(sent) < requests:
+            user = next(user_cycle)
+            start = time.perf_counter()
+            response = await send(client, user)
+            samples.append(time.perf_counter() - start)
+            statuses[response.status_code] += 1
+
+    with count_statements() as counter:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    return {
+        **latency_summary(samples),
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(len(samples) / elapsed, 1) if elapsed else 0.0,
+        "statements_per_request": round(counter["statements"] / max(len(samples), 1), 2),
+        "statuses": {str(code): count for code, count in sorted(statuses.items())},
+    }
+
+
+async def main(args):
+    if args.no_cache:
+        result_cache.backend = None
+
+    init_engines()
+    users = await load_users(args.users)
+    if not users:
+        raise SystemExit("No generated users found; run `python -m benchmarks.datagen` first.")
+
+    results = {
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "users": len(users),
+        "concurrency": args.concurrency,
+        "result_cache": not args.no_cache,
+        "scenarios": {},
+    }
+    if "auth_refresh" in args.scenarios:
+        await issue_refresh_tokens(users)
+    try:
+        async with asgi_client(app) as client:
+            for name in args.scenarios:
+                requests = args.login_requests if name == "auth_login" else args.requests
+                # Warm connections and caches so the first requests do not skew the tail.
+                await run_scenario(client, SCENARIOS[name], users, min(args.warmup, requests), args.concurrency)
+                results["scenarios"][name] = await run_scenario(
+                    client, SCENARIOS[name], users, requests, args.concurrency
+                )
+    finally:
+        await dispose_engines()
+    report("load", results, args.output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=500, help="Requests per scenario.")
+    parser.add_argument("--login-requests", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--users", type=int, default=100, help="How many generated users to spread requests over.")
+    parser.add_argument("--warmup", type=int, default=20, help="Unmeasured requests sent before each scenario.")
+    parser.add_argument("--scenarios", nargs="+", choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the result cache.")
+    parser.add_argument("--output", help="Also write the results to this JSON file.")
+    args = parser.parse_args()
+    asyncio.run(main(args))
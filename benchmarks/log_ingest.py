@@ -0,0 +1,89 @@
+# benchmarks/log_ingest.py
+"""Commits per second and POST /logs latency, per request vs. through the write-behind queue.
+
+    python -m benchmarks.log_ingest [--requests 2000] [--concurrency 50] [--users 100] [--output run.json]
+
+Runs the same burst of log requests, spread over users from benchmarks.datagen,
+in each LOG_INGEST_MODE: direct (one transaction per request), queued with
+ack=flush (requests wait for their batch) and queued with ack=accept (requests
+return once queued; drain_seconds is how long the queue then takes to empty).
+"""
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import event
+
+from api.db.database import dispose_engines, get_async_engine, init_engines
+from api.v1.services.log_queue import log_ingest_flush_time, log_queue
+from main import app
+
+from .common import asgi_client, report
+from .load import SCENARIOS, load_users, run_scenario
+
+MODES = {
+    "direct": (False, "flush"),
+    "queued_flush": (True, "flush"),
+    "queued_accept": (True, "accept"),
+}
+
+
+async def run_mode(client, users, enabled, ack, args):
+    log_queue.enabled = enabled
+    log_queue.ack = ack
+    if enabled:
+        log_queue.start()
+    commits = {"count": 0}
+
+    def _count(conn):
+        commits["count"] += 1
+
+    engine = get_async_engine().sync_engine
+    event.listen(engine, "commit", _count)
+    try:
+        start = time.perf_counter()
+        results = await run_scenario(client, SCENARIOS["logs"], users, args.requests, args.concurrency)
+        drain_start = time.perf_counter()
+        await log_queue.stop()
+        elapsed = time.perf_counter() - start
+    finally:
+        event.remove(engine, "commit", _count)
+
+    results.update({
+        "drain_seconds": round(time.perf_counter() - drain_start, 3),
+        "commits": commits["count"],
+        "commits_per_second": round(commits["count"] / elapsed, 1),
+        "requests_per_commit": round(args.requests / max(commits["count"], 1), 1),
+    })
+    if enabled:
+        results["flush_seconds"] = log_ingest_flush_time.snapshot()
+    return results
+
+
+async def main(args):
+    init_engines()
+    users = await load_users(args.users)
+    if not users:
+        raise SystemExit("No generated users found; run `python -m benchmarks.datagen` first.")
+
+    results = {"requests": args.requests, "concurrency": args.concurrency, "users": len(users),
+               "batch_size": log_queue.batch_size, "flush_ms": log_queue.flush_interval * 1000, "modes": {}}
+    try:
+        async with asgi_client(app) as client:
+            for name in args.modes:
+                enabled, ack = MODES[name]
+                results["modes"][name] = await run_mode(client, users, enabled, ack, args)
+    finally:
+        await dispose_engines()
+    report("log_ingest", results, args.output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--output", help="Also write the results to this JSON file.")
+    args = parser.parse_args()
+    asyncio.run(main(args))
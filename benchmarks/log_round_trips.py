@@ -0,0 +1,53 @@
+# benchmarks/log_round_trips.py
+"""Statements per LogService.log_study_sessions call as the number of courses grows.
+
+    python -m benchmarks.log_round_trips
+"""
+import asyncio
+import time
+
+from api.db.database import AsyncSessionLocal, init_engines
+from api.v1.models.user import User
+from api.v1.schemas.course import CourseCreate, LogCoursesRequest
+from api.v1.services.course import CourseService
+from api.v1.services.log import LogService
+
+from .common import count_statements, report, unique_email
+
+COURSE_COUNTS = (1, 5, 10, 20, 50)
+
+
+async def measure(course_count):
+    async with AsyncSessionLocal() as db:
+        user = User(email=unique_email("log"), username="bench")
+        db.add(user)
+        await db.commit()
+
+        names = [f"Course {i}" for i in range(course_count)]
+        await CourseService(db).create_courses(user.id, [CourseCreate(name=name) for name in names])
+
+        request = LogCoursesRequest(course_names=names)
+        with count_statements() as counter:
+            start = time.perf_counter()
+            await LogService(db).log_study_sessions(user.id, request)
+            elapsed = time.perf_counter() - start
+
+        # Logging the same courses again on the same day takes the no-new-day path.
+        with count_statements() as repeat_counter:
+            await LogService(db).log_study_sessions(user.id, request)
+
+    return {
+        "courses": course_count,
+        "statements_first_log": counter["statements"],
+        "statements_repeat_log": repeat_counter["statements"],
+        "first_log_ms": round(elapsed * 1000, 2),
+    }
+
+
+async def main():
+    init_engines()
+    report("log_round_trips", [await measure(count) for count in COURSE_COUNTS])
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
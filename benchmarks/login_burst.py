@@ -0,0 +1,62 @@
+# benchmarks/login_burst.py
+"""Latency of /dashboard/summary while a burst of logins is hashing passwords.
+
+    python -m benchmarks.login_burst [--logins 50] [--polls 200]
+
+Before password hashing moved off the event loop, every bcrypt call stalled
+all other requests in the worker, so summary p99 tracked the login burst.
+"""
+import argparse
+import asyncio
+import time
+
+from main import app
+
+from .common import asgi_client, latency_summary, register, report, unique_email
+
+
+async def poll_summary(client, headers, count, samples):
+    for _ in range(count):
+        start = time.perf_counter()
+        response = await client.get("/dashboard/summary", headers=headers)
+        response.raise_for_status()
+        samples.append(time.perf_counter() - start)
+
+
+async def login(client, email, password):
+    response = await client.post("/auth/login", json={"email": email, "password": password})
+    response.raise_for_status()
+
+
+async def main(logins, polls):
+    async with asgi_client(app) as client:
+        password = "bench-password"
+        login_email = unique_email("burst")
+        await register(client, login_email, password)
+        headers = await register(client, unique_email("poller"))
+
+        quiet = []
+        await poll_summary(client, headers, polls, quiet)
+
+        during_burst = []
+        burst_start = time.perf_counter()
+        await asyncio.gather(
+            poll_summary(client, headers, polls, during_burst),
+            *(login(client, login_email, password) for _ in range(logins)),
+        )
+        burst_seconds = time.perf_counter() - burst_start
+
+    report("login_burst", {
+        "logins": logins,
+        "burst_seconds": round(burst_seconds, 3),
+        "summary_quiet": latency_summary(quiet),
+        "summary_during_burst": latency_summary(during_burst),
+    })
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=50)
+    parser.add_argument("--polls", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.logins, args.polls))
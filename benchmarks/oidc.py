@@ -0,0 +1,184 @@
+# benchmarks/oidc.py
+"""Google sign-in latency against a local stand-in OpenID provider.
+
+    python -m benchmarks.oidc [--sign-ins 50] [--latency-ms 30] [--connect-latency-ms 100] [--output run.json]
+
+Serves a minimal OpenID provider (discovery, JWKS, token endpoint, RS256 ID
+tokens) on 127.0.0.1 and times the provider-facing part of /auth/google/callback:
+the code-for-token exchange and the ID token check. Every request to the
+stand-in waits --latency-ms, and the first request on each new connection
+waits --connect-latency-ms more, standing in for the TCP and TLS handshakes of
+a real provider.
+
+Compares a plain Authlib registration (metadata and keys fetched lazily during
+the first sign-in, a new connection per call) with GoogleAuth (both prefetched,
+calls over the shared keep-alive pool). After the timed sign-ins the provider
+rotates its signing key and one more sign-in is timed.
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from collections import Counter
+
+import uvicorn
+from authlib.integrations.starlette_client import OAuth
+from authlib.jose import JsonWebKey, jwt
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from api.core.google_auth import GoogleAuth
+from api.core.http import close_http_client
+
+from .common import latency_summary, report
+
+CLIENT_ID = "bench-client"
+CLIENT_SECRET = "bench-secret"
+REDIRECT_URI = "http://127.0.0.1/auth/google/callback"
+
+
+class StandInProvider:
+    """A minimal OpenID provider that counts the requests and connections it serves."""
+
+    def __init__(self, latency, connect_latency):
+        self.latency = latency
+        self.connect_latency = connect_latency
+        self.hits = Counter()
+        self.connections = set()
+        self.base_url = None
+        self.rotate_key()
+        self.app = Starlette(routes=[
+            Route("/.well-known/openid-configuration", self.discovery),
+            Route("/jwks", self.jwks),
+            Route("/token", self.token, methods=["POST"]),
+        ])
+        self.app.add_middleware(_Delay, provider=self)
+
+    def rotate_key(self):
+        self.key = JsonWebKey.generate_key("RSA", 2048, is_private=True, options={"kid": uuid.uuid4().hex})
+
+    async def discovery(self, request):
+        return JSONResponse({
+            "issuer": self.base_url,
+            "authorization_endpoint": f"{self.base_url}/authorize",
+            "token_endpoint": f"{self.base_url}/token",
+            "jwks_uri": f"{self.base_url}/jwks",
+            "id_token_signing_alg_values_supported": ["RS256"],
+        })
+
+    async def jwks(self, request):
+        return JSONResponse({"keys": [self.key.as_dict(is_private=False)]})
+
+    async def token(self, request):
+        form = await request.form()
+        now = int(time.time())
+        id_token = jwt.encode({"alg": "RS256", "kid": self.key.kid}, {
+            "iss": self.base_url, "aud": CLIENT_ID, "sub": form["code"], "email": f"{form['code']}@example.com",
+            # The benchmark uses the code as the nonce too
+            "nonce": form["code"], "iat": now, "exp": now + 3600,
+        }, self.key)
+        return JSONResponse({
+            "access_token": uuid.uuid4().hex, "token_type": "Bearer", "expires_in": 3600,
+            "id_token": id_token.decode(),
+        })
+
+
+class _Delay:
+    def __init__(self, app, provider):
+        self.app = app
+        self.provider = provider
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            provider = self.provider
+            provider.hits[scope["path"]] += 1
+            delay = provider.latency
+            if scope["client"] not in provider.connections:
+                provider.connections.add(scope["client"])
+                delay += provider.connect_latency
+            await asyncio.sleep(delay)
+        await self.app(scope, receive, send)
+
+
+async def serve(provider):
+    server = uvicorn.Server(uvicorn.Config(provider.app, host="127.0.0.1", port=0, log_level="warning", lifespan="off"))
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    port = server.servers[0].sockets[0].getsockname()[1]
+    provider.base_url = f"http://127.0.0.1:{port}"
+    return server, task
+
+
+async def sign_in(client):
+    """What authorize_access_token does once the state is checked: exchange the code, verify the ID token."""
+    code = uuid.uuid4().hex
+    token = await client.fetch_access_token(code=code, redirect_uri=REDIRECT_URI)
+    userinfo = await client.parse_id_token(token, nonce=code)
+    assert userinfo["sub"] == code
+
+
+async def run_mode(provider, client, sign_ins):
+    provider.hits.clear()
+    provider.connections.clear()
+    samples = []
+    for _ in range(sign_ins):
+        start = time.perf_counter()
+        await sign_in(client)
+        samples.append(time.perf_counter() - start)
+
+    results = {
+        "first_sign_in_ms": round(samples[0] * 1000, 2),
+        "after_first": latency_summary(samples[1:]),
+        "provider_requests": dict(provider.hits),
+        "connections": len(provider.connections),
+    }
+
+    provider.rotate_key()
+    provider.hits.clear()
+    start = time.perf_counter()
+    await sign_in(client)
+    results["after_key_rotation"] = {
+        "sign_in_ms": round((time.perf_counter() - start) * 1000, 2),
+        "provider_requests": dict(provider.hits),
+    }
+    return results
+
+
+async def main(args):
+    provider = StandInProvider(args.latency_ms / 1000, args.connect_latency_ms / 1000)
+    server, task = await serve(provider)
+    discovery_url = f"{provider.base_url}/.well-known/openid-configuration"
+    results = {"sign_ins": args.sign_ins, "latency_ms": args.latency_ms, "connect_latency_ms": args.connect_latency_ms}
+    try:
+        oauth = OAuth()
+        oauth.register(
+            name="plain", client_id=CLIENT_ID, client_secret=CLIENT_SECRET,
+            server_metadata_url=discovery_url, client_kwargs={"scope": "openid email profile"},
+        )
+        results["authlib_lazy"] = await run_mode(provider, oauth.plain, args.sign_ins)
+
+        google_auth = GoogleAuth(CLIENT_ID, CLIENT_SECRET, discovery_url)
+        # What the app's lifespan does at startup, awaited here so it is not timed
+        google_auth.start()
+        while not google_auth.metadata.stats()["loaded"]:
+            await asyncio.sleep(0.01)
+        results["pooled_prefetched"] = await run_mode(provider, google_auth.oauth.google, args.sign_ins)
+        await google_auth.stop()
+    finally:
+        await close_http_client()
+        server.should_exit = True
+        await task
+    report("oidc", results, args.output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sign-ins", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=30, help="Added to every request to the stand-in provider.")
+    parser.add_argument("--connect-latency-ms", type=float, default=100,
+                        help="Added to the first request on each new connection.")
+    parser.add_argument("--output", help="Also write the results to this JSON file.")
+    args = parser.parse_args()
+    asyncio.run(main(args))
@@ -0,0 +1,133 @@
+# benchmarks/serialization.py
+"""Cost of building, validating and encoding large checklist and analytics responses.
+
+    python -m benchmarks.serialization [--courses 2000] [--series-courses 20] [--iterations 50] [--output run.json]
+
+Seeds a user with many courses and a year of study days, then times, per
+endpoint, the service turning rows into a result, FastAPI validating it
+against the route's response_model, and the app's response class encoding it
+(next to the stdlib JSONResponse for comparison). The result cache is
+bypassed, and the database time is part of build_ms only.
+"""
+import argparse
+import asyncio
+import inspect
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute, serialize_response
+from sqlalchemy import insert
+
+from api.db.database import AsyncSessionLocal, init_engines
+from api.v1.models import Course, StudyDay, User, UserCourse
+from api.v1.services.analytics import AnalyticsService
+from api.v1.services.dashboard import DashboardService
+from main import app
+
+from .common import latency_summary, report, unique_email, utc_today
+
+DAYS = 365
+
+
+async def seed(db, course_count, series_courses):
+    user = User(email=unique_email("serialization"), username="bench")
+    courses = [Course(name=f"Course {i:05d}") for i in range(course_count)]
+    db.add(user)
+    db.add_all(courses)
+    await db.flush()
+
+    now = datetime.now(timezone.utc)
+    await db.execute(insert(UserCourse), [
+        {"user_id": user.id, "course_id": c.id, "last_studied_at": now - timedelta(minutes=random.randrange(DAYS * 1440))}
+        for c in courses
+    ])
+    today = utc_today()
+    await db.execute(insert(StudyDay), [
+        {"user_id": user.id, "course_id": course.id, "day": today - timedelta(days=offset)}
+        for offset in range(DAYS)
+        for course in courses[:series_courses]
+        if random.random() < 0.5
+    ])
+    await db.commit()
+    return user.id
+
+
+def route_for(path):
+    for route in app.routes:
+        if isinstance(route, APIRoute) and route.path == path and "GET" in route.methods:
+            return route
+    raise LookupError(path)
+
+
+async def measure(route, build, iterations):
+    response_class = getattr(route.response_class, "value", route.response_class)
+    build_samples, validate_samples, render_samples, stdlib_samples = [], [], [], []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        result = await build()
+        build_samples.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        content = await serialize_response(
+            field=route.response_field, response_content=result, exclude_none=route.response_model_exclude_none
+        )
+        validate_samples.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        body = response_class(content).body
+        render_samples.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        JSONResponse(content)
+        stdlib_samples.append(time.perf_counter() - start)
+
+    return {
+        "bytes": len(body),
+        "response_class": response_class.__name__,
+        "build_ms": latency_summary(build_samples),
+        "validate_ms": latency_summary(validate_samples),
+        "render_ms": latency_summary(render_samples),
+        "render_stdlib_json_ms": latency_summary(stdlib_samples),
+    }
+
+
+async def main(course_count, series_courses, iterations, output=None):
+    init_engines()
+    async with AsyncSessionLocal() as db:
+        user_id = await seed(db, course_count, series_courses)
+        today = utc_today()
+        dashboard, analytics = DashboardService(db), AnalyticsService(db)
+        # Call the undecorated methods so the result cache does not answer.
+        checklist = inspect.unwrap(DashboardService.get_checklist_items)
+        snapshot = inspect.unwrap(DashboardService.get_snapshot)
+        per_range = inspect.unwrap(AnalyticsService.get_course_study_days)
+        overview = inspect.unwrap(AnalyticsService.get_study_overview)
+
+        results = {"courses": course_count, "series_courses": series_courses, "days": DAYS}
+        results["dashboard_checklist"] = await measure(
+            route_for("/dashboard/checklist"), lambda: checklist(dashboard, user_id), iterations
+        )
+        results["dashboard_snapshot"] = await measure(
+            route_for("/dashboard/snapshot"), lambda: snapshot(dashboard, user_id, today, ("summary", "checklist")),
+            iterations,
+        )
+        results["analytics"] = await measure(
+            route_for("/analytics"), lambda: per_range(analytics, user_id, DAYS, today), iterations
+        )
+        results["analytics_overview_series"] = await measure(
+            route_for("/analytics/overview"), lambda: overview(analytics, user_id, (7, 30, 90, DAYS), today, True),
+            iterations,
+        )
+    report("serialization", results, output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--courses", type=int, default=2000)
+    parser.add_argument("--series-courses", type=int, default=20)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--output", help="Also write the results to this JSON file.")
+    args = parser.parse_args()
+    asyncio.run(main(args.courses, args.series_courses, args.iterations, args.output))
@@ -0,0 +1,77 @@
+# benchmarks/startup.py
+"""Worker startup time: importing main:app and reaching the first ready response.
+
+    python -m benchmarks.startup [--runs 10]
+
+Each run starts a fresh interpreter, so module import costs are measured cold.
+The import is also timed with an unreachable DATABASE_URL: it must succeed,
+because the schema is migrated separately and engines are created in the lifespan.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from .common import latency_summary, report
+
+# Runs inside the child interpreter and prints its timings as JSON.
+CHILD = """
+import asyncio, json, sys, time
+start = time.perf_counter()
+from main import app
+imported = time.perf_counter() - start
+if sys.argv[1] == "import":
+    print(json.dumps({"import": imported}))
+    raise SystemExit
+
+import httpx
+
+async def first_request():
+    begin = time.perf_counter()
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            response = await client.get("/ready")
+            response.raise_for_status()
+    return time.perf_counter() - begin
+
+ready = asyncio.run(first_request())
+print(json.dumps({"import": imported, "ready": ready, "total": imported + ready}))
+"""
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_child(mode, env=None):
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD, mode],
+        cwd=ROOT,
+        env={**os.environ, **(env or {})},
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main(runs):
+    offline = [
+        run_child("import", {"DATABASE_URL": "postgresql://bench@127.0.0.1:1/unreachable", "ASYNC_DATABASE_URL": ""})
+        for _ in range(runs)
+    ]
+    online = [run_child("ready") for _ in range(runs)]
+    report("startup", {
+        "runs": runs,
+        "import_without_database": latency_summary([run["import"] for run in offline]),
+        "import": latency_summary([run["import"] for run in online]),
+        "lifespan_to_first_ready": latency_summary([run["ready"] for run in online]),
+        "import_to_first_ready": latency_summary([run["total"] for run in online]),
+    })
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+    main(args.runs)
@@ -1,26 +1,48 @@
 # main.py
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, PlainTextResponse
+from sqlalchemy import text
 import os
 from dotenv import load_dotenv
 
-from api.db.database import Base, engine
+from api.db.database import dispose_engines, get_async_engine, init_engines
+from api.db.pool import pool_stats
+from api.db.replicas import replica_router
+from api.core.cache import result_cache
+from api.core.google_auth import google_auth
+from api.core.http import close_http_client
+from api.core.instrumentation import MetricsMiddleware
+from api.core.metrics import registry
+from api.core.security import user_cache, verified_tokens, password_hashing_stats
 from api.v1.routes.auth import router as auth_router
 from api.v1.routes.dashboard import router as dashboard_router
 from api.v1.routes.course import router as course_router
 from api.v1.routes.log import router as log_router
 from api.v1.routes.analytics import router as analytics_router
+from api.v1.services.log_queue import log_queue
+from api.v1.schemas.health import ReadinessFailure, ReadinessResponse
+from api.v1.schemas.user import MessageResponse
 
 load_dotenv()
 
-# Base.metadata.drop_all(bind=engine)
-# print("All tables dropped")
+# The schema is managed by Alembic (`python manage.py migrate`), not at startup.
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    init_engines()
+    if log_queue.enabled:
+        log_queue.start()
+    # Fetch Google's OpenID metadata and keys now rather than during the first sign-in.
+    google_auth.start()
+    yield
+    # Write out queued study logs while the database is still reachable.
+    await log_queue.stop()
+    await google_auth.stop()
+    await close_http_client()
+    await dispose_engines()
 
-# Recreate tables from models
-Base.metadata.create_all(bind=engine)
-print("All tables created")
-
-app = FastAPI(title="Trak API")
+app = FastAPI(title="Trak API", lifespan=lifespan, default_response_class=ORJSONResponse)
 
 
 app.add_middleware(
@@ -30,11 +52,44 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
 
-@app.get("/", tags=["health"])
+@app.get("/", tags=["health"], response_model=MessageResponse)
 def health_check():
     return {"message": f"Server is running and healthy"}
 
+@app.get(
+    "/ready", tags=["health"], response_model=ReadinessResponse,
+    responses={503: {"model": ReadinessFailure, "description": "The database is unreachable."}},
+)
+async def readiness_check():
+    async_engine = get_async_engine()
+    pool = async_engine.pool
+    try:
+        async with async_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+    except Exception as e:
+        return ORJSONResponse(
+            status_code=503,
+            content=ReadinessFailure(detail=str(e), pool=pool_stats.snapshot(pool)).model_dump(),
+        )
+    return {
+        "status": "ready",
+        "pool": pool_stats.snapshot(pool),
+        "replicas": replica_router.stats(),
+        "user_cache": user_cache.stats(),
+        "token_cache": verified_tokens.stats(),
+        "result_cache": result_cache.stats(),
+        "password_hashing": password_hashing_stats(),
+        "log_ingest": log_queue.stats(),
+        "google_oidc": google_auth.metadata.stats(),
+    }
+
+@app.get("/metrics", tags=["health"], response_class=PlainTextResponse)
+def metrics():
+    """Request, SQL, pool and password hashing metrics in the Prometheus text format."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
 app.include_router(auth_router, prefix="/auth", tags=["auth"])
 app.include_router(dashboard_router, prefix="/dashboard", tags=["dashboard"])
 app.include_router(course_router, prefix="/courses", tags=["courses"])
@@ -0,0 +1,100 @@
+# manage.py
+import argparse
+import asyncio
+import os
+from sqlalchemy import select
+
+from api.db.database import AsyncSessionLocal, dispose_engines, init_engines
+from api.v1.models.user import User
+from api.v1.services.importer import IMPORT_FORMATS, ImportService
+from api.v1.services.rollup import RollupService
+
+
+async def _resolve_user_id(db, email):
+    if email is None:
+        return None
+    user_id = await db.scalar(select(User.id).where(User.email == email))
+    if user_id is None:
+        raise SystemExit(f"No user with email '{email}'.")
+    return user_id
+
+
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.abspath(__file__)), "alembic.ini")
+
+
+def migrate(args):
+    from alembic import command
+    from alembic.config import Config
+
+    command.upgrade(Config(ALEMBIC_INI), args.revision, sql=args.sql)
+
+
+async def rebuild_rollups(args):
+    init_engines()
+    try:
+        async with AsyncSessionLocal() as db:
+            user_id = await _resolve_user_id(db, args.user)
+            rollups = RollupService(db)
+            day_rows = await rollups.rebuild_study_days(user_id)
+            streak_rows = await rollups.rebuild_streaks(user_id)
+    finally:
+        await dispose_engines()
+    print(f"Rebuilt study_days: {day_rows} rows, user_streaks: {streak_rows} rows")
+
+
+async def _file_lines(path):
+    with open(path, encoding="utf-8-sig", newline="") as source:
+        for line in source:
+            yield line.rstrip("\r\n")
+
+
+async def import_sessions(args):
+    from fastapi import HTTPException
+
+    import_format = args.format or ("csv" if args.file.lower().endswith(".csv") else "ndjson")
+    init_engines()
+    try:
+        async with AsyncSessionLocal() as db:
+            user_id = await _resolve_user_id(db, args.user)
+            tz_name = await db.scalar(select(User.timezone).where(User.id == user_id))
+            try:
+                result = await ImportService(db).import_study_sessions(
+                    user_id, _file_lines(args.file), import_format, tz_name
+                )
+            except HTTPException as e:
+                raise SystemExit(e.detail)
+    finally:
+        await dispose_engines()
+    print(
+        f"Imported {result['imported']} of {result['rows']} sessions "
+        f"({result['skipped_duplicates']} duplicates skipped, {len(result['created_courses'])} courses created)"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Trak API maintenance commands.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    upgrade = commands.add_parser("migrate", help="Upgrade the database schema with Alembic.")
+    upgrade.add_argument("revision", nargs="?", default="head", help="Target revision (default: head).")
+    upgrade.add_argument("--sql", action="store_true", help="Print the migration SQL instead of running it.")
+    upgrade.set_defaults(handler=migrate)
+
+    rebuild = commands.add_parser("rebuild-rollups", help="Rebuild derived study tables from study_sessions.")
+    rebuild.add_argument("--user", help="Only rebuild the rollups of the user with this email.")
+    rebuild.set_defaults(handler=rebuild_rollups)
+
+    importer = commands.add_parser("import-sessions", help="Import historical study sessions from a CSV or NDJSON file.")
+    importer.add_argument("file", help="File with course_name and date fields; CSV needs a header row.")
+    importer.add_argument("--user", required=True, help="Email of the user to import the sessions for.")
+    importer.add_argument("--format", choices=IMPORT_FORMATS, help="Defaults to csv for .csv files, ndjson otherwise.")
+    importer.set_defaults(handler=import_sessions)
+
+    args = parser.parse_args()
+    result = args.handler(args)
+    if asyncio.iscoroutine(result):
+        asyncio.run(result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""study session indexes
+
+Adds the per-user lookup indexes on study_sessions, and lets the database
+enforce one user_courses row per (user, course) and one study session per
+course per UTC day. Existing duplicates are merged first.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 15:22:10.481215
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, Sequence[str], None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Fold duplicate course links into the one with the most study days.
+    op.execute("""
+        WITH ranked AS (
+            SELECT id,
+                   first_value(id) OVER w AS keep_id,
+                   max(total_study_days) OVER (PARTITION BY user_id, course_id) AS total_study_days,
+                   max(last_studied_at) OVER (PARTITION BY user_id, course_id) AS last_studied_at
+            FROM user_courses
+            WINDOW w AS (PARTITION BY user_id, course_id ORDER BY coalesce(total_study_days, 0) DESC, id)
+        ),
+        merged AS (
+            UPDATE user_courses uc
+            SET total_study_days = ranked.total_study_days, last_studied_at = ranked.last_studied_at
+            FROM ranked
+            WHERE uc.id = ranked.id AND ranked.id = ranked.keep_id
+        )
+        DELETE FROM user_courses uc
+        USING ranked
+        WHERE uc.id = ranked.id AND ranked.id <> ranked.keep_id
+    """)
+    # Keep only the earliest session per course per UTC day.
+    op.execute("""
+        DELETE FROM study_sessions s
+        USING study_sessions earlier
+        WHERE s.user_id = earlier.user_id
+          AND s.course_id = earlier.course_id
+          AND CAST(timezone('UTC', s.date) AS DATE) = CAST(timezone('UTC', earlier.date) AS DATE)
+          AND (earlier.date, earlier.id) < (s.date, s.id)
+    """)
+
+    op.create_unique_constraint('uq_user_courses_user_course', 'user_courses', ['user_id', 'course_id'])
+    op.create_index('ix_study_sessions_user_date', 'study_sessions', ['user_id', 'date'], unique=False)
+    op.create_index('ix_study_sessions_user_course_date', 'study_sessions', ['user_id', 'course_id', 'date'], unique=False)
+    op.create_index('uq_study_sessions_user_course_day', 'study_sessions', ['user_id', 'course_id', sa.literal_column("CAST(timezone('UTC', date) AS DATE)")], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_study_sessions_user_course_day', table_name='study_sessions')
+    op.drop_index('ix_study_sessions_user_course_date', table_name='study_sessions')
+    op.drop_index('ix_study_sessions_user_date', table_name='study_sessions')
+    op.drop_constraint('uq_user_courses_user_course', 'user_courses', type_='unique')
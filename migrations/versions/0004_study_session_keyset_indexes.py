@@ -0,0 +1,37 @@
+"""study session keyset indexes
+
+Extends the per-user study_sessions indexes with id, the tie-breaker of the
+(date, id) keyset used by the history endpoint. The new indexes are built
+before the old ones, which they cover, are dropped.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 15:31:16.708662
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, Sequence[str], None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_study_sessions_user_course_date_id', 'study_sessions', ['user_id', 'course_id', 'date', 'id'], unique=False)
+    op.create_index('ix_study_sessions_user_date_id', 'study_sessions', ['user_id', 'date', 'id'], unique=False)
+    op.drop_index(op.f('ix_study_sessions_user_course_date'), table_name='study_sessions')
+    op.drop_index(op.f('ix_study_sessions_user_date'), table_name='study_sessions')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index(op.f('ix_study_sessions_user_date'), 'study_sessions', ['user_id', 'date'], unique=False)
+    op.create_index(op.f('ix_study_sessions_user_course_date'), 'study_sessions', ['user_id', 'course_id', 'date'], unique=False)
+    op.drop_index('ix_study_sessions_user_date_id', table_name='study_sessions')
+    op.drop_index('ix_study_sessions_user_course_date_id', table_name='study_sessions')
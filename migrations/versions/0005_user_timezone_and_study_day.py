@@ -0,0 +1,48 @@
+"""user timezone and study day
+
+Adds users.timezone and a stored study_sessions.study_day, the calendar day
+of the session in its user's timezone. Existing sessions are backfilled from
+their timestamp; every user starts in UTC, so their days are unchanged. The
+one-session-per-day constraint moves from the UTC expression to study_day.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 15:45:23.217649
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, Sequence[str], None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('timezone', sa.String(), server_default='UTC', nullable=False))
+    op.add_column('study_sessions', sa.Column('study_day', sa.Date(), nullable=True))
+    op.execute("""
+        UPDATE study_sessions AS s
+        SET study_day = CAST(timezone(u.timezone, s.date) AS DATE)
+        FROM users AS u
+        WHERE u.id = s.user_id
+    """)
+    op.alter_column('study_sessions', 'study_day', nullable=False)
+    op.create_index('uq_study_sessions_user_course_study_day', 'study_sessions', ['user_id', 'course_id', 'study_day'], unique=True)
+    op.create_index('ix_study_sessions_user_study_day', 'study_sessions', ['user_id', 'study_day'], unique=False)
+    op.drop_index(op.f('uq_study_sessions_user_course_day'), table_name='study_sessions')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index(op.f('uq_study_sessions_user_course_day'), 'study_sessions', ['user_id', 'course_id', sa.literal_column("(timezone('UTC'::text, date)::date)")], unique=True)
+    op.drop_index('ix_study_sessions_user_study_day', table_name='study_sessions')
+    op.drop_index('uq_study_sessions_user_course_study_day', table_name='study_sessions')
+    op.drop_column('study_sessions', 'study_day')
+    op.drop_column('users', 'timezone')
@@ -0,0 +1,83 @@
+"""study day and streak rollups
+
+Adds study_days, one row per (user, course, day) studied, and user_streaks,
+each user's current and longest run of consecutive study days, and fills
+both from study_sessions with the same statements as RollupService.
+
+Databases migrated before these tables moved out of 0001 already have them;
+they are left as they are.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 17:05:12.330918
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, Sequence[str], None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if sa.inspect(op.get_bind()).has_table('study_days'):
+        return
+
+    op.create_table('study_days',
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('course_id', sa.UUID(), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.ForeignKeyConstraint(['course_id'], ['courses.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'course_id', 'day')
+    )
+    op.create_index('ix_study_days_user_day', 'study_days', ['user_id', 'day'], unique=False)
+    op.create_table('user_streaks',
+    sa.Column('user_id', sa.UUID(), nullable=False),
+    sa.Column('current_streak', sa.Integer(), nullable=False),
+    sa.Column('longest_streak', sa.Integer(), nullable=False),
+    sa.Column('last_study_day', sa.Date(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+
+    # RollupService.rebuild_study_days, for every user
+    op.execute("""
+        INSERT INTO study_days (user_id, course_id, day)
+        SELECT DISTINCT user_id, course_id, study_day FROM study_sessions
+    """)
+    # RollupService.rebuild_streaks: a run of consecutive days shares day - rank
+    op.execute("""
+        INSERT INTO user_streaks (user_id, current_streak, longest_streak, last_study_day)
+        SELECT user_id, length, longest, end_day
+        FROM (
+            SELECT user_id, length, end_day,
+                   max(length) OVER (PARTITION BY user_id) AS longest,
+                   row_number() OVER (PARTITION BY user_id ORDER BY end_day DESC) AS recency
+            FROM (
+                SELECT user_id, count(*) AS length, max(day) AS end_day
+                FROM (
+                    SELECT user_id, day,
+                           day - CAST(row_number() OVER (PARTITION BY user_id ORDER BY day) AS INTEGER) AS anchor
+                    FROM (SELECT DISTINCT user_id, day FROM study_days) AS days
+                ) AS islands
+                GROUP BY user_id, anchor
+            ) AS runs
+        ) AS ranked_runs
+        WHERE recency = 1
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('user_streaks')
+    op.drop_index('ix_study_days_user_day', table_name='study_days')
+    op.drop_table('study_days')